@@ -0,0 +1,73 @@
+import importlib
+import os
+import sys
+
+"""
+Description:
+This script is a single entry point for the scripts in this repository:
+- toc2csv: publication_xml_to_csv.py
+- checklist: publication_checklist.py
+- regstatus: publication_registration_status.py
+- batch: publication_batch.py
+- diff: toc_diff.py
+- serve: query_server.py
+
+The arguments after the subcommand are those of the corresponding script.
+Only the module of the subcommand that is run is imported, so e.g. toc2csv
+only loads the standard library (csv and ElementTree) and does not pay for
+importing pandas, numpy and xlsxwriter. This keeps the start-up time low when
+the scripts are run once per track from a shell loop or a Makefile.
+
+Syntax: python acm_assist.py <subcommand> <arguments of the subcommand>
+        python acm_assist.py <subcommand> --help
+Example syntax: python acm_assist.py toc2csv data/sample-main-acmcms-toc.xml
+                exported-data/sample-main-acmcms-toc.csv
+"""
+
+# The module and a one-line description of each subcommand. The modules are
+# only imported when their subcommand is run.
+COMMANDS = {'toc2csv': ('publication_xml_to_csv',
+                        'convert the HotCRP TOC .xml file into the .csv format required by ACM'),
+            'checklist': ('publication_checklist',
+                          'create the camera-ready checklist .xlsx file'),
+            'regstatus': ('publication_registration_status',
+                          'create the registration status .xlsx file'),
+            'batch': ('publication_batch',
+                      'create the .xlsx files of several conferences from a manifest'),
+            'diff': ('toc_diff',
+                     'list the papers changed between two HotCRP TOC .xml files'),
+            'serve': ('query_server',
+                      'answer queries about papers and registrations from a local server')}
+
+def print_usage(file_out=sys.stdout):
+    prog = os.path.basename(sys.argv[0])
+    print('usage:', prog, '{' + ','.join(COMMANDS) + '} ...', file=file_out)
+    print('\nsubcommands:', file=file_out)
+    for command_now, (_, help_now) in COMMANDS.items():
+        print('  {:<12}{}'.format(command_now, help_now), file=file_out)
+    print('\nRun "' + prog + ' <subcommand> --help" for the arguments of a ' \
+          'subcommand.', file=file_out)
+
+# The main function looks up the subcommand in argv, imports its module and
+# passes the remaining arguments to the main function of that module. Each of
+# those takes main(argv=None, prog=None): argv is the command-line arguments
+# (sys.argv[1:] when argv is None) and prog the program name shown in the
+# usage message, e.g. "acm_assist.py regstatus". The exit status is the value
+# returned by that function (0 when it returns None).
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print_usage()
+        return 0
+    if argv[0] not in COMMANDS:
+        print_usage(sys.stderr)
+        print('\nerror: unknown subcommand "' + argv[0] + '"', file=sys.stderr)
+        return 2
+
+    module = importlib.import_module(COMMANDS[argv[0]][0])
+    status = module.main(argv[1:], prog=os.path.basename(sys.argv[0]) + ' ' + argv[0])
+
+    return status or 0
+
+if __name__ == "__main__":
+    sys.exit(main())
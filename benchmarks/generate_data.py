@@ -0,0 +1,288 @@
+import argparse
+import csv
+import os
+import random
+import unicodedata
+from xml.sax.saxutils import escape
+
+"""
+Description:
+This script writes synthetic input files with the same layout as the files in
+data/, at any size, so that the scripts in this repository can be tested and
+benchmarked on conferences much larger than the samples:
+- one .xml file per track, as produced by the 'Download TOC' button on HotCRP,
+- a .txt file listing the .xml files (as read by read_xml_text),
+- a .csv file as produced by the 'Create CSV' button on the ACM SIG Conference
+Management System, listing the papers of every track,
+- a .csv file as produced by the registration Google form.
+
+The data is meant to look like the real thing: author names contain non-ASCII
+characters and often have no middle name, some authors have no country, paper
+titles on the Google form are sometimes typed with a different case or
+punctuation, some authors submit the form twice and some registrations are for
+papers that are not in the proceedings. The same seed always produces the same
+files.
+
+Syntax: python benchmarks/generate_data.py <output-directory>
+        [--papers N] [--tracks N] [--seed N]
+Example syntax: python benchmarks/generate_data.py exported-data/synthetic-1000
+                --papers 1000 --tracks 6
+"""
+
+FIRST_NAMES = ['Julian', 'Zoë', 'Søren', 'Łukasz', 'Χρήστος', 'José', 'Anaïs',
+               'Björn', 'Chloé', 'Dmitrij', 'Ayşe', 'Priya', 'Olúwaseun',
+               'Maëlle', 'Jiří', 'Wei', 'Ngọc', 'Rebecca', 'Matthew', 'Aroha',
+               'Siobhán', 'Kenji', 'Fatima', 'Ramachandra', 'Émile']
+MIDDLE_NAMES = ['J.', 'M.', 'Stephen', 'Anne', 'Bach', 'Rao', 'Q.', 'Ørjan']
+LAST_NAMES = ['Müller', 'García', 'Øvergaard', 'Kowalczyk', 'Παπαδόπουλος',
+              'Wang', 'Đặng', 'Smith', "O'Brien", 'Nakamura', 'Şahin', 'Dvořák',
+              'Ngata', 'Van der Berg', 'De Hoog', 'Böhm', 'Nguyen', 'Kolluri',
+              'Forshaw', 'Ilfrich', 'Lahariya', 'Schwerdt', 'Karrari']
+AFFILIATIONS = [('IBM Research Australia', 'Australia'),
+                ('Newcastle University', 'United Kingdom'),
+                ('Karlsruhe Institute of Technology (KIT)', 'Germany'),
+                ('Tsinghua University', 'China'),
+                ('Ghent University', 'Belgium'),
+                ('Université Grenoble Alpes', 'France'),
+                ('Universidad de São Paulo', 'Brazil'),
+                ('University of Auckland', 'New Zealand'),
+                ('Indian Institute of Science', 'India'),
+                ('ETH Zürich', 'Switzerland')]
+DOMAINS = ['example.edu', 'example.ac.uk', 'example.de', 'example.org',
+           'mail.example.cn', 'example.com']
+TITLE_WORDS = ['energy', 'learning', 'optimal', 'storage', 'control', 'dynamic',
+               'pricing', 'privacy', 'load', 'monitoring', 'battery', 'solar',
+               'grid', 'demand', 'response', 'forecasting', 'electric',
+               'vehicle', 'charging', 'market', 'agent', 'model', 'validation',
+               'distributed', 'federated', 'carbon', 'aware', 'scheduling',
+               'data', 'centers', 'microgrid', 'flexibility', 'household',
+               'non-intrusive', 'disaggregation', 'wind', 'power', 'robust',
+               'stochastic', 'networks', 'sensing', 'buildings', 'thermal',
+               'comfort', 'reinforcement', 'heat', 'pumps', 'resilience']
+TRACKS = ['main', 'poster', 'demo', 'phd', 'workshop1', 'workshop2',
+          'workshop3', 'workshop4', 'workshop5', 'workshop6', 'workshop7',
+          'workshop8']
+TRACK_TYPES = {'main': ['Full Paper', 'Full Paper', 'Short Paper'],
+               'poster': ['Poster Paper'],
+               'demo': ['Demo Paper']}
+TRACK_PREFIXES = {'poster': 'Poster: ', 'demo': 'Demo: '}
+CONFERENCE = 'bench26'
+
+def _ascii(text_in):
+    text_out = unicodedata.normalize('NFKD', text_in)
+    text_out = text_out.encode('ascii', 'ignore').decode('ascii')
+
+    return ''.join(c_now for c_now in text_out.lower() if c_now.isalnum())
+
+def _make_author(rng):
+    f_name = rng.choice(FIRST_NAMES)
+    m_name = rng.choice(MIDDLE_NAMES) if rng.random() < 0.3 else None
+    l_name = rng.choice(LAST_NAMES)
+    affiliation, country = rng.choice(AFFILIATIONS)
+    if rng.random() < 0.05:
+        country = None
+    email = '{}.{}{}@{}'.format(_ascii(f_name) or 'author', \
+                                _ascii(l_name) or 'name', \
+                                rng.randint(1, 9999), rng.choice(DOMAINS))
+
+    return {'first_name': f_name, 'middle_name': m_name, 'last_name': l_name,
+            'affiliation': affiliation, 'country': country, 'email': email}
+
+def _make_title(rng, used_titles):
+    while True:
+        words = rng.sample(TITLE_WORDS, rng.randint(5, 11))
+        title = ' '.join(words)
+        title = title[0].upper() + title[1:]
+        if title not in used_titles:
+            used_titles.add(title)
+            return title
+
+# The make_papers function returns the synthetic papers, spread over n_tracks
+# tracks: the main track gets about half of the papers.
+def make_papers(n_papers, n_tracks, seed=0):
+    rng = random.Random(seed)
+    tracks = TRACKS[:max(1, min(n_tracks, len(TRACKS)))]
+    weights = [len(tracks)] + [1] * (len(tracks) - 1)
+    used_titles = set()
+    paper_ids = dict.fromkeys(tracks, 0)
+    papers = []
+    for _ in range(n_papers):
+        track = rng.choices(tracks, weights)[0]
+        paper_ids[track] += 1
+        title = TRACK_PREFIXES.get(track, '') + _make_title(rng, used_titles)
+        papers.append({'track': track,
+                       'id': paper_ids[track],
+                       'type': rng.choice(TRACK_TYPES.get(track, ['Full Paper', 'Short Paper'])),
+                       'title': title,
+                       'authors': [_make_author(rng) for _ in range(rng.randint(1, 8))]})
+
+    return papers
+
+def track_preamble(track_in):
+    return CONFERENCE + track_in + '-p'
+
+def _element(tag_in, text_in, indent_in):
+    if text_in is None:
+        return indent_in + '<' + tag_in + '/>\n'
+
+    return indent_in + '<' + tag_in + '>' + escape(str(text_in)) + '</' + tag_in + '>\n'
+
+# The write_toc function writes the papers of one track as a HotCRP TOC .xml
+# file.
+def write_toc(papers_in, track_in, xml_out):
+    with open(xml_out, 'w', encoding='utf-8') as f_out:
+        f_out.write('<?xml version="1.0" encoding="UTF-8"?>\n<erights_record>\n')
+        f_out.write('  <parent_data>\n    <proceeding>11214</proceeding>\n'
+                    '    <pacm/>\n    <volume/>\n    <issue/>\n'
+                    '    <issue_date/>\n  </parent_data>\n')
+        for paper in papers_in:
+            if paper['track'] != track_in:
+                continue
+            f_out.write('  <paper>\n')
+            f_out.write(_element('paper_type', paper['type'], '    '))
+            f_out.write(_element('paper_title', paper['title'], '    '))
+            f_out.write(_element('event_tracking_number', \
+                                 track_preamble(track_in) + str(paper['id']), '    '))
+            f_out.write('    <published_article_number/>\n    <start_page/>\n'
+                        '    <end_page/>\n    <authors>\n')
+            for seq_no, a_author in enumerate(paper['authors'], 1):
+                f_out.write('      <author>\n        <prefix/>\n')
+                f_out.write(_element('first_name', a_author['first_name'], '        '))
+                f_out.write(_element('middle_name', a_author['middle_name'], '        '))
+                f_out.write(_element('last_name', a_author['last_name'], '        '))
+                f_out.write('        <suffix/>\n')
+                f_out.write(_element('affiliation', a_author['affiliation'], '        '))
+                f_out.write(_element('country', a_author['country'], '        '))
+                f_out.write(_element('email_address', a_author['email'], '        '))
+                f_out.write(_element('sequence_no', seq_no, '        '))
+                f_out.write(_element('contact_author', 'Y' if seq_no == 1 else 'N', '        '))
+                f_out.write('        <gender/>\n        <age/>\n'
+                            '        <ACM_profile_id/>\n        <ACM_client_no/>\n'
+                            '      </author>\n')
+            f_out.write('    </authors>\n  </paper>\n')
+        f_out.write('</erights_record>\n')
+
+def _author_name(a_author):
+    if a_author['middle_name'] is None:
+        return a_author['first_name'] + ' ' + a_author['last_name']
+
+    return a_author['first_name'] + ' ' + a_author['middle_name'] + ' ' + \
+           a_author['last_name']
+
+# The write_acm_csv function writes the papers of every track as an ACM CMS
+# export .csv file.
+def write_acm_csv(papers_in, csv_out):
+    header = ['Contact No.', 'Title', 'Author', 'Email', 'Rights Granted',
+              'Third Party', 'Aux. Material', 'Video Recording',
+              'Artistic Images', 'Govt. Employees', 'Open Access', 'DOI',
+              'Authorizer', 'Statement', 'CC License', 'Non-ACM Copyright']
+    with open(csv_out, 'w', encoding='utf-8', newline='') as f_out:
+        acm_writer = csv.writer(f_out, quoting=csv.QUOTE_ALL)
+        acm_writer.writerow(header)
+        for paper_no, paper in enumerate(papers_in):
+            doi = '10.1145/3396851.{}'.format(3397000 + paper_no)
+            title = paper['title']
+            if paper['track'] not in TRACK_PREFIXES:
+                title += (' \\setcopyright{acmlicensed}'
+                          "\\acmConference[Bench'26]{The Synthetic ACM "
+                          'Conference on Benchmarks}{June 22--26, 2026}'
+                          '{Virtual Event}\\acmBooktitle{The Synthetic ACM '
+                          "Conference on Benchmarks (Bench'26), June 22--26, "
+                          '2026, Virtual Event}\\acmPrice{15.00}'
+                          '\\acmDOI{' + doi + '}')
+            title += ' full strip notes'
+            authors = ';'.join(_author_name(a_author) + ':' + a_author['affiliation'] \
+                               for a_author in paper['authors'])
+            rights = paper['type'] + ' pdf 07-May-2026 License'
+            acm_writer.writerow(['', title, authors, paper['authors'][0]['email'],
+                                 rights, 'NONE', ' ', 'AV 1:YES', ' ', 'NO', ' ',
+                                 'https://doi.org/' + doi, '', 'rights statement',
+                                 ' ', ' '])
+
+def _typo_title(rng, title_in):
+    variant = rng.randint(0, 2)
+    if variant == 0:
+        return title_in.lower()
+    if variant == 1:
+        return title_in.replace(' ', '  ', 1) + '.'
+
+    return title_in.replace('-', ' ').upper()
+
+# The write_google_form function writes the registration Google form .csv file.
+# About registration_rate of the papers are registered; some registrations are
+# submitted twice, some titles are mistyped and some registrations are for
+# papers that are not in the proceedings.
+def write_google_form(papers_in, csv_out, registration_rate=0.8, seed=0):
+    rng = random.Random(seed + 1)
+    header = ['Timestamp', 'Email address', 'Paper ID', 'Paper title',
+              'Paper type', 'Name of author registered to attend conference']
+    minute = 0
+    rows = []
+    for paper in papers_in:
+        if rng.random() > registration_rate:
+            continue
+        a_author = rng.choice(paper['authors'])
+        title = paper['title']
+        if rng.random() < 0.05:
+            title = _typo_title(rng, title)
+        rows.append([a_author['email'], paper['id'], title,
+                     paper['type'].replace(' Paper', ''), _author_name(a_author)])
+        if rng.random() < 0.05:
+            rows.append(list(rows[-1]))
+    for extra_no in range(max(1, len(papers_in) // 100)):
+        rows.append(['late.{}@example.org'.format(extra_no), 9000 + extra_no,
+                     'Withdrawn paper number {}'.format(extra_no), 'Full',
+                     'Late Author {}'.format(extra_no)])
+    rng.shuffle(rows)
+
+    with open(csv_out, 'w', encoding='utf-8-sig', newline='') as f_out:
+        form_writer = csv.writer(f_out)
+        form_writer.writerow(header)
+        for row_now in rows:
+            minute += rng.randint(0, 30)
+            day, rest = divmod(minute, 24 * 60)
+            timestamp = '{}/5/26 {}:{:02d}'.format(1 + day % 28, rest // 60, rest % 60)
+            form_writer.writerow([timestamp] + row_now)
+
+# The generate_dataset function writes a complete synthetic data set to
+# out_dir and returns the paths of the files it wrote.
+def generate_dataset(out_dir, n_papers, n_tracks=4, seed=0):
+    os.makedirs(out_dir, exist_ok=True)
+    papers = make_papers(n_papers, n_tracks, seed)
+    tracks = list(dict.fromkeys(paper['track'] for paper in papers))
+    tracks.sort(key=TRACKS.index)
+
+    xml_files = {}
+    for track_now in tracks:
+        xml_files[track_now] = os.path.join(out_dir, track_now + '-acmcms-toc.xml')
+        write_toc(papers, track_now, xml_files[track_now])
+    xml_list = os.path.join(out_dir, 'xml_list.txt')
+    with open(xml_list, 'w') as f_out:
+        for track_now in tracks:
+            f_out.write(track_now + ' ' + xml_files[track_now] + '\n')
+
+    acm_csv = os.path.join(out_dir, 'acm-cms-export.csv')
+    write_acm_csv(papers, acm_csv)
+    form_csv = os.path.join(out_dir, 'google-form.csv')
+    write_google_form(papers, form_csv, seed=seed)
+
+    return {'xml_files': xml_files,
+            'xml_list': xml_list,
+            'acm_csv': acm_csv,
+            'form_csv': form_csv,
+            'main_preamble': track_preamble(tracks[0])}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Write synthetic HotCRP, ' \
+                                     'ACM and Google form input files.')
+    parser.add_argument('out_dir', help='directory the files are written to')
+    parser.add_argument('--papers', type=int, default=1000, \
+                        help='number of papers (default: 1000)')
+    parser.add_argument('--tracks', type=int, default=4, \
+                        help='number of tracks (default: 4, at most %d)' % len(TRACKS))
+    parser.add_argument('--seed', type=int, default=0, help='random seed')
+    args = parser.parse_args()
+
+    dataset = generate_dataset(args.out_dir, args.papers, args.tracks, args.seed)
+    for key_now, value_now in dataset.items():
+        print(key_now + ':', value_now)
@@ -0,0 +1,253 @@
+import argparse
+import contextlib
+import datetime
+import glob
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import publication_checklist
+import publication_registration_status
+import publication_xml_to_csv
+from generate_data import generate_dataset
+
+"""
+Description:
+This script measures how the stages of the three scripts in this repository
+scale with the size of the conference. For each requested number of papers, a
+synthetic data set is written with generate_data.py and the following stages
+are run on it, one after the other:
+- toc2csv: convert_xmldata + write_to_csv (publication_xml_to_csv.py) on the
+main track
+- checklist stages (publication_checklist.py): create_acm_df, create_hotcrp_df,
+create_merged_df, write_to_excel
+- registration stages (publication_registration_status.py): create_dictdf,
+create_googledf, merge_df, merge_regdf, create_tagdf_bytag,
+summarize_regstatus, write_to_excel
+
+The start-up time of each subcommand of acm_assist.py is also measured: the
+median wall-clock time of running "python acm_assist.py <subcommand> --help"
+in a new process, and whether pandas was imported along the way (toc2csv
+should only load the standard library).
+
+Each stage is run twice: once to measure its wall-clock time, and once under
+tracemalloc to measure its peak memory (tracemalloc slows Python code down a
+lot, so the two are not measured together). The parse cache is not used.
+
+The results are written to benchmarks/results/bench-<date>-<time>.json,
+together with the git commit and library versions, and compared with the
+previous results file so that regressions are visible.
+
+Syntax: python benchmarks/run_benchmarks.py [--sizes N [N ...]] [--tracks N]
+        [--no-memory] [--cold-start-runs N] [--results-dir <directory>]
+Example syntax: python benchmarks/run_benchmarks.py --sizes 100 1000 10000
+"""
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+ACM_ASSIST = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), \
+                          'acm_assist.py')
+COLD_START_COMMANDS = ['toc2csv', 'checklist', 'regstatus']
+# A stage is reported as a regression when it is this much slower (or uses this
+# much more memory) than in the previous results file.
+REGRESSION_RATIO = 1.2
+
+def _time_stage(fn_in):
+    start = time.perf_counter()
+    result = fn_in()
+
+    return result, {'seconds': time.perf_counter() - start}
+
+def _memory_stage(fn_in):
+    tracemalloc.start()
+    try:
+        result = fn_in()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return result, {'peak_mb': peak / 2**20}
+
+# The run_pipeline function runs every stage on one data set and returns the
+# measurements of each stage. measure_fn is either _time_stage or
+# _memory_stage.
+def run_pipeline(dataset_in, out_dir, measure_fn):
+    stages = {}
+
+    def _stage(name_in, fn_in):
+        with contextlib.redirect_stdout(io.StringIO()):
+            result, stages[name_in] = measure_fn(fn_in)
+        return result
+
+    # The checklist stages use the first track, whose preamble is main_preamble
+    main_xml = next(iter(dataset_in['xml_files'].values()))
+    _stage('toc2csv', lambda: publication_xml_to_csv.write_to_csv( \
+        publication_xml_to_csv.convert_xmldata(main_xml), \
+        os.path.join(out_dir, 'toc.csv')))
+
+    acm_df = _stage('create_acm_df', lambda: publication_checklist.create_acm_df( \
+        dataset_in['acm_csv']))
+    hotcrp_df = _stage('create_hotcrp_df', lambda: publication_checklist.create_hotcrp_df( \
+        main_xml, dataset_in['main_preamble']))
+    df_all = _stage('create_merged_df', lambda: publication_checklist.create_merged_df( \
+        acm_df, hotcrp_df, publication_checklist.COLUMNS_ADD, 'inner'))
+    _stage('checklist_write_to_excel', lambda: publication_checklist.write_to_excel( \
+        df_all, os.path.join(out_dir, 'checklist.xlsx'), publication_checklist.COLUMNS_ADD))
+
+    prs = publication_registration_status
+    xml_dict = prs.read_xml_text(dataset_in['xml_list'])
+    paper_dict = _stage('create_dictdf', lambda: prs.create_dictdf(xml_dict))
+    reg_df = _stage('create_googledf', lambda: prs.create_googledf(dataset_in['form_csv']))
+    papermerged_df = _stage('merge_df', lambda: prs.merge_df(paper_dict))
+    paperreg_df = _stage('merge_regdf', lambda: prs.merge_regdf(papermerged_df, reg_df))
+    by_type = _stage('create_tagdf_bytag', lambda: prs.create_tagdf_bytag(xml_dict, paperreg_df))
+    summaries = _stage('summarize_regstatus', lambda: prs.summarize_regstatus(by_type, paperreg_df))
+    _stage('regstatus_write_to_excel', lambda: prs.write_to_excel( \
+        papermerged_df, summaries['piv_tagtypedf'], summaries['paperreg_summarydf'], \
+        by_type, summaries['paperreg_unregdf'], os.path.join(out_dir, 'regstatus.xlsx'), \
+        summaries['paperreg_countrydf']))
+
+    return stages
+
+# The measure_cold_start function runs each subcommand of acm_assist.py with
+# --help in a new Python process n_runs times and returns the median time, and
+# whether pandas was imported (as reported by python -X importtime).
+def measure_cold_start(n_runs):
+    cold_start = {}
+    for command_now in COLD_START_COMMANDS:
+        cmd = [sys.executable, ACM_ASSIST, command_now, '--help']
+        run_times = []
+        for _ in range(n_runs):
+            start = time.perf_counter()
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+            run_times.append(time.perf_counter() - start)
+        import_log = subprocess.run([sys.executable, '-X', 'importtime'] + cmd[1:], \
+                                    check=True, stdout=subprocess.DEVNULL, \
+                                    stderr=subprocess.PIPE, text=True).stderr
+        cold_start[command_now] = {'seconds': statistics.median(run_times),
+                                   'imports_pandas': ' pandas\n' in import_log}
+
+    return cold_start
+
+def print_cold_start(cold_start_in, previous_in=None):
+    print('\ncold start (acm_assist.py <subcommand> --help)')
+    print('{:<26}{:>10}{:>12}{:>22}'.format('subcommand', 'seconds', 'pandas', 'vs previous'))
+    for command_now, stats_now in cold_start_in.items():
+        old_stats = (previous_in or {}).get(command_now, {})
+        print('{:<26}{:>10.3f}{:>12}{:>22}'.format( \
+            command_now, stats_now['seconds'], \
+            'yes' if stats_now['imports_pandas'] else 'no', \
+            _format_change(stats_now['seconds'], old_stats.get('seconds'))))
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], \
+                              capture_output=True, text=True, \
+                              cwd=os.path.dirname(RESULTS_DIR)).stdout.strip()
+    except OSError:
+        return ''
+
+# The run_benchmarks function generates a data set for each size, runs the
+# pipeline on it and returns all the measurements.
+def run_benchmarks(sizes_in, n_tracks, measure_memory=True, seed=0, \
+                   cold_start_runs=5):
+    results = {'created': datetime.datetime.now().isoformat(timespec='seconds'),
+               'git_commit': _git_commit(),
+               'python': platform.python_version(),
+               'pandas': pd.__version__,
+               'tracks': n_tracks,
+               'sizes': {}}
+    if cold_start_runs > 0:
+        results['cold_start'] = measure_cold_start(cold_start_runs)
+        print_cold_start(results['cold_start'])
+    for size_now in sizes_in:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dataset = generate_dataset(tmp_dir, size_now, n_tracks, seed)
+            stages = run_pipeline(dataset, tmp_dir, _time_stage)
+            if measure_memory:
+                for name_now, stats_now in run_pipeline(dataset, tmp_dir, \
+                                                        _memory_stage).items():
+                    stages[name_now].update(stats_now)
+        results['sizes'][str(size_now)] = stages
+        print_results(size_now, stages)
+
+    return results
+
+def _format_change(new_in, old_in):
+    if not old_in:
+        return ''
+    ratio = new_in / old_in
+    flag = '  REGRESSION' if ratio > REGRESSION_RATIO else ''
+
+    return '{:+.0f}%{}'.format((ratio - 1) * 100, flag)
+
+# The print_results function prints one table per data set size, including the
+# change compared with the previous results when they are given.
+def print_results(size_in, stages_in, previous_in=None):
+    print('\n{} papers'.format(size_in))
+    print('{:<26}{:>10}{:>12}{:>22}'.format('stage', 'seconds', 'peak MB', 'vs previous'))
+    for name_now, stats_now in stages_in.items():
+        old_stats = (previous_in or {}).get(name_now, {})
+        change = _format_change(stats_now['seconds'], old_stats.get('seconds'))
+        if 'peak_mb' in stats_now and old_stats.get('peak_mb'):
+            change += ' / ' + _format_change(stats_now['peak_mb'], old_stats['peak_mb'])
+        print('{:<26}{:>10.3f}{:>12}{:>22}'.format( \
+            name_now, stats_now['seconds'], \
+            '{:.1f}'.format(stats_now['peak_mb']) if 'peak_mb' in stats_now else '-', \
+            change))
+
+def latest_results(results_dir):
+    results_files = sorted(glob.glob(os.path.join(results_dir, 'bench-*.json')))
+    if not results_files:
+        return None
+    with open(results_files[-1]) as f_in:
+        return json.load(f_in)
+
+def save_results(results_in, results_dir):
+    os.makedirs(results_dir, exist_ok=True)
+    results_out = os.path.join(results_dir, 'bench-{}.json'.format( \
+        datetime.datetime.now().strftime('%Y%m%d-%H%M%S')))
+    with open(results_out, 'w') as f_out:
+        json.dump(results_in, f_out, indent=2)
+
+    return results_out
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the stages of ' \
+                                     'the three scripts on synthetic data.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], \
+                        metavar='N', help='numbers of papers to benchmark ' \
+                        '(default: 100 1000 10000)')
+    parser.add_argument('--tracks', type=int, default=6, \
+                        help='number of tracks (default: 6)')
+    parser.add_argument('--no-memory', action='store_true', \
+                        help='only measure time, not peak memory')
+    parser.add_argument('--cold-start-runs', type=int, default=5, metavar='N', \
+                        help='number of runs used to measure the start-up ' \
+                        'time of each subcommand (default: 5, 0 to skip)')
+    parser.add_argument('--results-dir', default=RESULTS_DIR, \
+                        help='where the results are stored')
+    args = parser.parse_args()
+
+    previous = latest_results(args.results_dir)
+    bench_results = run_benchmarks(args.sizes, args.tracks, not args.no_memory, \
+                                   cold_start_runs=args.cold_start_runs)
+    print('\nResults written to', save_results(bench_results, args.results_dir))
+
+    if previous is not None:
+        print('\nCompared with the results of', previous['created'], \
+              '(' + previous.get('git_commit', '') + ')')
+        if 'cold_start' in bench_results and 'cold_start' in previous:
+            print_cold_start(bench_results['cold_start'], previous['cold_start'])
+        for size_now, stages_now in bench_results['sizes'].items():
+            if size_now in previous['sizes']:
+                print_results(size_now, stages_now, previous['sizes'][size_now])
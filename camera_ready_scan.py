@@ -0,0 +1,195 @@
+import glob
+import os
+import re
+import zipfile
+import pandas as pd
+from parallel_tasks import run_parallel
+from parse_cache import cached_frame
+from title_join import align_titles
+
+"""
+Description:
+This module scans the camera-ready LaTeX sources of the papers, one .zip
+archive per paper, and pre-fills the check columns of the checklist .xlsx
+file (see publication_checklist.py) with "OK" or "FALSE":
+- DOI_check: the \\acmDOI{} of the paper is the DOI listed by ACM
+- Template_check: the paper uses \\documentclass[sigconf]{acmart}
+- CCS_Keyword_check: the paper has a CCSXML block, \\ccsdesc commands and
+\\keywords
+- Email_affiliation_check: every \\author has an \\email and an \\affiliation
+- ACM_ref_check: the ACM reference format is printed (printacmref is not set
+to false), and the \\setcopyright and \\acmConference values are those listed
+by ACM
+The other checks are left to be filled in by hand.
+
+The .tex files are read straight from the .zip archive, without extracting it
+to disk (LaTeX comments are ignored). The archives are scanned in a pool of
+worker processes, and what is found in each archive is kept in the parse
+cache (see parse_cache.py), keyed by the contents of the archive, so only new
+or re-uploaded archives are read again. An archive that cannot be read (e.g.
+a corrupt upload) is reported and skipped, and the checks of its paper are
+left empty.
+
+Each archive is matched to a paper by the first number of its file name, after
+the preamble of the paper IDs (e.g. "eenergy20-p"), which must be the paper ID
+listed in the checklist, e.g. "2.zip", "paper2.zip", "eenergy20-p2.zip" or
+"eenergy20-p2-v3.zip" for paper 2.
+
+Example usage:
+    df_all = prefill_checks(df_all, acm_df, 'data/camera-ready', 'eenergy20-p', jobs=4)
+"""
+
+# Bump this whenever _scan_archive produces a different dataframe.
+SCAN_VERSION = 1
+
+ARCHIVE_ID_RE = re.compile(r'^\D*(\d+)')
+# The DOI at the end of a DOI URL, e.g. https://doi.org/10.1145/3396851.3397681
+ACM_DOI_URL_RE = re.compile(r'(?P<DOI>10\.\d+/\S+?)\s*$')
+COMMENT_RE = re.compile(r'(?<!\\)%.*')
+DOCUMENTCLASS_RE = re.compile(r'\\documentclass\s*(?:\[(?P<options>[^\]]*)\])?\s*\{(?P<cls>[^}]*)\}')
+ACMDOI_RE = re.compile(r'\\acmDOI\s*\{([^}]*)\}')
+COPYRIGHT_RE = re.compile(r'\\setcopyright\s*\{([^}]*)\}')
+CONFERENCE_RE = re.compile(r'\\acmConference\s*(?:\[[^\]]*\])?\s*\{([^}]*)\}')
+CCSXML_RE = re.compile(r'\\begin\s*\{CCSXML\}')
+CCSDESC_RE = re.compile(r'\\ccsdesc\b')
+KEYWORDS_RE = re.compile(r'\\keywords\s*\{')
+AUTHOR_RE = re.compile(r'\\author\s*(?:\[[^\]]*\])?\s*\{')
+EMAIL_RE = re.compile(r'\\email\s*\{')
+AFFILIATION_RE = re.compile(r'\\affiliation\s*\{')
+PRINTACMREF_OFF_RE = re.compile(r'printacmref\s*=\s*false')
+
+# The read_tex_sources function returns the text of all the .tex files of a
+# .zip archive, without the LaTeX comments.
+def read_tex_sources(archive_in):
+    tex_sources = []
+    with zipfile.ZipFile(archive_in) as zip_in:
+        for name_now in sorted(zip_in.namelist()):
+            if not name_now.lower().endswith('.tex') or name_now.startswith('__MACOSX/'):
+                continue
+            tex_now = zip_in.read(name_now).decode('utf-8', errors='replace')
+            tex_sources.append(COMMENT_RE.sub('', tex_now))
+
+    return '\n'.join(tex_sources)
+
+def _first_group(regex_in, text_in, group_in=1):
+    found = regex_in.search(text_in)
+
+    return found.group(group_in).strip() if found and found.group(group_in) else None
+
+# The _scan_archive function returns a one-row dataframe with what was found
+# in the .tex files of one archive.
+def _scan_archive(archive_in):
+    tex = read_tex_sources(archive_in)
+
+    return pd.DataFrame([{'Document_class': _first_group(DOCUMENTCLASS_RE, tex, 'cls'),
+                          'Class_options': _first_group(DOCUMENTCLASS_RE, tex, 'options'),
+                          'Tex_DOI': _first_group(ACMDOI_RE, tex),
+                          'Tex_copyright': _first_group(COPYRIGHT_RE, tex),
+                          'Tex_conference': _first_group(CONFERENCE_RE, tex),
+                          'Has_CCSXML': bool(CCSXML_RE.search(tex)),
+                          'Has_ccsdesc': bool(CCSDESC_RE.search(tex)),
+                          'Has_keywords': bool(KEYWORDS_RE.search(tex)),
+                          'N_author': len(AUTHOR_RE.findall(tex)),
+                          'N_email': len(EMAIL_RE.findall(tex)),
+                          'N_affiliation': len(AFFILIATION_RE.findall(tex)),
+                          'Printacmref_off': bool(PRINTACMREF_OFF_RE.search(tex))}])
+
+# The scan_archive function is run for every archive, either in this process
+# or in a worker process, and names the archive in any error it raises.
+def scan_archive(archive_in, use_cache=True):
+    try:
+        return cached_frame(archive_in, 'scan_archive', SCAN_VERSION, _scan_archive, \
+                            use_cache=use_cache)
+    except Exception as err:
+        raise RuntimeError('Could not scan {}: {}: {}'.format( \
+            archive_in, type(err).__name__, err)) from err
+
+# The scan_archives function scans every .zip archive of archive_dir, in up to
+# jobs worker processes, and returns one row per archive, with the paper ID
+# taken from the file name in the "Id" column. The preamble of the paper IDs is
+# skipped when the file name starts with it, so that e.g. the "20" of
+# "eenergy20-p2.zip" is not taken for the paper ID.
+def scan_archives(archive_dir, preamble='', jobs=1, use_cache=True):
+    archives = {}
+    for archive_now in sorted(glob.glob(os.path.join(archive_dir, '*.zip'))):
+        name_now = os.path.splitext(os.path.basename(archive_now))[0]
+        if preamble and name_now.startswith(preamble):
+            name_now = name_now[len(preamble):]
+        id_match = ARCHIVE_ID_RE.match(name_now)
+        if id_match is None:
+            print('Skipping', archive_now + ': no paper ID in the file name')
+            continue
+        paper_id = str(int(id_match.group(1)))
+        if paper_id in archives:
+            print('Paper', paper_id, 'has several archives, using', archive_now)
+        archives[paper_id] = archive_now
+
+    # An archive that cannot be read (e.g. a corrupt or non-zip upload) is
+    # reported and skipped, and the checks of its paper are left empty.
+    scanned, errors = run_parallel(scan_archive, \
+                                   {paper_id: (archives[paper_id], use_cache) \
+                                    for paper_id in archives}, jobs)
+    for paper_id, err in errors.items():
+        print(str(err) + ', leaving the checks of paper', paper_id, 'empty')
+
+    if not scanned:
+        return pd.DataFrame(columns=['Id', 'Archive'])
+    scan_df = pd.concat(list(scanned.values()), ignore_index=True)
+    scan_df.insert(0, 'Id', list(scanned))
+    scan_df.insert(1, 'Archive', [archives[paper_id] for paper_id in scanned])
+
+    return scan_df
+
+def _check_value(cond_in):
+    return cond_in.map({True: 'OK', False: 'FALSE'})
+
+# The scan_checks function compares what was found in each archive with the
+# ACM data of the paper, and returns one "OK"/"FALSE" column per check.
+# scan_in must have the "DOI", "ACM_DOI", "Copyright" and "Conference"
+# columns of create_acm_df. The \acmDOI{} of the paper is compared with the
+# \acmDOI value listed by ACM or, when ACM lists none, with the DOI of the
+# DOI URL listed by ACM.
+def scan_checks(scan_in):
+    options = scan_in['Class_options'].fillna('').str.replace(' ', '').str.split(',')
+    n_author = scan_in['N_author']
+    acm_doi = scan_in['ACM_DOI'].fillna(scan_in['DOI'].str.extract(ACM_DOI_URL_RE)['DOI'])
+
+    return pd.DataFrame({
+        'DOI_check': _check_value(scan_in['Tex_DOI'].notna() & \
+                                  (scan_in['Tex_DOI'] == acm_doi)),
+        'Template_check': _check_value((scan_in['Document_class'] == 'acmart') & \
+                                       options.map(lambda x: 'sigconf' in x)),
+        'CCS_Keyword_check': _check_value(scan_in['Has_CCSXML'] & scan_in['Has_ccsdesc'] & \
+                                          scan_in['Has_keywords']),
+        'Email_affiliation_check': _check_value((n_author > 0) & \
+                                                (scan_in['N_email'] >= n_author) & \
+                                                (scan_in['N_affiliation'] >= n_author)),
+        'ACM_ref_check': _check_value(~scan_in['Printacmref_off'] & \
+                                      (scan_in['Tex_copyright'] == scan_in['Copyright']) & \
+                                      (scan_in['Tex_conference'] == scan_in['Conference']))},
+        index=scan_in.index)
+
+# The prefill_checks function scans the archives of archive_dir, named after
+# the paper IDs with or without their preamble, and fills in the empty check
+# columns of the checklist df_in (as produced by create_merged_df) for the
+# papers that have an archive. Checks that already
+# have a value (e.g. kept from a previous checklist) are not changed.
+def prefill_checks(df_in, acm_in, archive_dir, preamble='', jobs=1, use_cache=True):
+    scan_df = scan_archives(archive_dir, preamble, jobs=jobs, use_cache=use_cache)
+    acm_in, _ = align_titles(df_in, acm_in)
+    acm_in = acm_in.drop_duplicates('P_title').set_index('P_title')
+    acm_columns = ['DOI', 'ACM_DOI', 'Copyright', 'Conference']
+    paper_acm = df_in[['Id', 'P_title']].join(acm_in[acm_columns], on='P_title')
+    scan_df = scan_df.merge(paper_acm.drop_duplicates('Id'), on='Id', how='inner')
+    if len(scan_df) == 0:
+        print('No archive matches a paper of the checklist')
+        return df_in
+
+    checks = scan_checks(scan_df).set_index(scan_df['Id'])
+    cond_scanned = df_in['Id'].isin(checks.index)
+    for col_now in checks.columns:
+        cond_fill = cond_scanned & (df_in[col_now].fillna('') == '')
+        df_in.loc[cond_fill, col_now] = df_in.loc[cond_fill, 'Id'].map(checks[col_now])
+    print('Pre-filled the checks of', int(cond_scanned.sum()), 'papers from', archive_dir)
+
+    return df_in
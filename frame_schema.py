@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype
+
+"""
+Description:
+This module sets compact dtypes on the dataframes of the scripts in this
+repository, so that large conferences use less memory:
+- the columns with few distinct values (paper type, track, country,
+registration status, ...) listed in CATEGORY_COLUMNS are stored as
+categoricals: one small integer code per row, and each distinct value once,
+- the other text columns (titles, names, emails, ...) are stored as Arrow
+strings when the optional pyarrow package is installed (pip install pyarrow),
+and as pandas strings otherwise. With pandas older than 2.3, which cannot
+store missing strings as NaN, they are left as Python objects.
+Columns holding numbers, or a mix of numbers and text (e.g. "P_id", which is
+"N/A" for the papers without a registration), are left as they are.
+
+apply_schema is called where the dataframes are read (the .xml and .csv
+files) and wherever dataframes are concatenated or joined, as both turn
+categoricals with different categories back into plain text.
+
+Example usage:
+    paper_df = apply_schema(paper_df)
+"""
+
+# The columns stored as categoricals, whatever the dataframe they are in.
+CATEGORY_COLUMNS = ['Type',
+                    'Type_x',
+                    'Type_y',
+                    'ACM_type',
+                    'Tag',
+                    'Country',
+                    'Copyright',
+                    'Conference_short',
+                    'Conference',
+                    'R_status',
+                    'P_status',
+                    'Match_method']
+
+# The string_dtype function returns the dtype of the text columns. Missing
+# values are NaN, as in object columns, so that comparisons keep returning
+# plain booleans.
+def string_dtype():
+    try:
+        import pyarrow
+        storage = 'pyarrow'
+    except ImportError:
+        storage = 'python'
+    try:
+        return pd.StringDtype(storage, na_value=np.nan)
+    except TypeError:
+        # pandas < 2.3 has no na_value
+        return np.dtype(object)
+
+STRING_DTYPE = string_dtype()
+
+# The apply_schema function returns df_in with the columns of CATEGORY_COLUMNS
+# as categoricals and the other text columns as STRING_DTYPE.
+def apply_schema(df_in):
+    dtypes = {}
+    for col_now in df_in.columns:
+        dtype_now = df_in[col_now].dtype
+        if col_now in CATEGORY_COLUMNS:
+            if not isinstance(dtype_now, pd.CategoricalDtype):
+                dtypes[col_now] = 'category'
+        elif dtype_now != STRING_DTYPE and \
+             (dtype_now == object or isinstance(dtype_now, pd.StringDtype)) and \
+             infer_dtype(df_in[col_now], skipna=True) in ('string', 'empty'):
+            dtypes[col_now] = STRING_DTYPE
+
+    return df_in.astype(dtypes) if dtypes else df_in
@@ -0,0 +1,106 @@
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+
+"""
+Description:
+This module reads the XML file available on the HotCRP website
+(via 'Settings' -> 'ACM' -> 'Download TOC' button) one <paper> element at a
+time, so that the scripts in this repository do not have to hold the whole
+<erights_record> tree in memory.
+
+Each <paper> element is turned into a compact Paper record once its closing
+tag has been read, and the element is then cleared, so memory stays flat no
+matter how many papers (and authors) the TOC contains.
+
+A Paper record contains:
+- paper_type: paper type ("Short Paper", "Full Paper", "Poster Paper")
+- paper_title: paper title
+- event_tracking_number: the paper ID with its preamble, e.g. "eenergy20-p2"
+- authors: a tuple of Author records, in the order listed in the .xml file
+
+An Author record contains:
+- name: "<first_name> <last_name>" or "<first_name> <middle_name> <last_name>"
+- affiliation: author affiliation
+- country: author country
+- email: author email
+
+read_xml_text reads the .txt file listing the .xml file of each track, one
+"<tag> <path-to-.xml-file>" line per track.
+
+Example usage:
+    for paper in iter_papers('data/sample-main-acmcms-toc.xml'):
+        print(paper.paper_title, [a.name for a in paper.authors])
+"""
+
+Paper = namedtuple('Paper', ['paper_type',
+                             'paper_title',
+                             'event_tracking_number',
+                             'authors'])
+
+Author = namedtuple('Author', ['name', 'affiliation', 'country', 'email'])
+
+# The _author_name function builds the author name in the same way as the
+# HotCRP TOC is read everywhere else, i.e. the middle name is only included
+# when it is present in the .xml file.
+def _author_name(f_name, m_name, l_name):
+    if m_name is None:
+        a_name = f_name + " " + l_name
+    else:
+        a_name = f_name + " " + m_name + " " + l_name
+
+    return a_name
+
+# The _read_author function reads the children of one <author> element in a
+# single pass instead of calling find() once per field.
+def _read_author(author_in):
+    fields = {}
+    for child in author_in:
+        fields[child.tag] = child.text
+
+    return Author(_author_name(fields.get('first_name'),
+                               fields.get('middle_name'),
+                               fields.get('last_name')),
+                  fields.get('affiliation'),
+                  fields.get('country'),
+                  fields.get('email_address'))
+
+# The _read_paper function converts one complete <paper> element into a
+# Paper record.
+def _read_paper(paper_in):
+    fields = {}
+    authors = ()
+    for child in paper_in:
+        if child.tag == 'authors':
+            authors = tuple(_read_author(a_author) for a_author in child
+                            if a_author.tag == 'author')
+        else:
+            fields[child.tag] = child.text
+
+    return Paper(fields.get('paper_type'),
+                 fields.get('paper_title'),
+                 fields.get('event_tracking_number'),
+                 authors)
+
+# The iter_papers function streams the <paper> elements of the .xml file and
+# yields one Paper record per paper. xml_in can either be a path or a file
+# object opened in binary mode.
+def iter_papers(xml_in):
+    context = ET.iterparse(xml_in, events=('start', 'end'))
+    _, root = next(context)
+    for event, elem in context:
+        if event == 'end' and elem.tag == 'paper':
+            yield _read_paper(elem)
+            # The paper has been read, so drop it (and anything before it)
+            # from the tree to keep memory flat.
+            root.clear()
+
+# The read_xml_text function returns a dictionary of {tag: path to the .xml
+# file} from the .txt file listing the .xml file of each track, in the order
+# of the .txt file.
+def read_xml_text(xml_in):
+    xml_d = {}
+    with open(xml_in) as f_name:
+        for line in f_name:
+            (tag, file_location) = line.split()
+            xml_d[tag] = file_location
+    return xml_d
@@ -0,0 +1,131 @@
+import argparse
+import os
+import sqlite3
+import pandas as pd
+from xlsx_writer import create_workbook, create_status_formats, write_df
+from paper_store import paper_authors
+
+"""
+Description:
+This module writes the tables produced by publication_checklist.py and
+publication_registration_status.py to formats that other tools can query
+directly, instead of re-reading the .xlsx files:
+- "sqlite": one SQLite database file, with one table per dataframe and an
+index on each of the columns used to look papers up (see INDEX_COLUMNS),
+- "parquet": one directory, with one <table>.parquet file per dataframe. This
+requires the optional pyarrow package (pip install pyarrow),
+- "xlsx": one .xlsx file, with one sheet per dataframe.
+
+Each format is a function in OUTPUT_BACKENDS that takes a dictionary of
+{table name: dataframe} and the path to write to, so another format can be
+added by adding a function to the dictionary. The scripts choose the formats
+with "--export FORMAT=PATH", which can be given several times.
+
+Example usage:
+    write_tables({'papers': papers_df,
+                  'authors': author_table([paper_store], papers_df, ['P_title', 'Tag'])},
+                 'sqlite', 'exported-data/sample-registration-status.db')
+"""
+
+# The columns that are indexed in SQLite, when a table has them.
+INDEX_COLUMNS = ['Id', 'P_title', 'Tag', 'Email', 'Username', 'R_status']
+
+# The author_table function returns one row per author of each paper of
+# df_in, as listed on the paper in the paper stores stores_in (see
+# paper_store.py, e.g. a single store or one store per track), rather than by splitting the ';'-joined "Author", "Email"
+# and "Affiliation" columns again. The papers of df_in are found in the store
+# by their "P_title" (and "Tag", when it is one of key_columns).
+# key_columns are copied from the paper to each of its authors, and
+# "Position" is the position of the author in the author list (from 1).
+def author_table(stores_in, df_in, key_columns):
+    join_columns = [col_now for col_now in ('P_title', 'Tag') if col_now in key_columns]
+    author_list = []
+    for store_now in stores_in:
+        for paper in store_now['papers']:
+            for position, a_author in enumerate(paper_authors(store_now, paper.paper_id)):
+                author_list.append([paper.paper_title, paper.tag, position + 1, \
+                                    a_author['name'], a_author['email'], \
+                                    a_author['affiliation']])
+    authors_df = pd.DataFrame(author_list, columns=['P_title', 'Tag', 'Position', 'Author', \
+                                                    'Email', 'Affiliation'])
+
+    papers_df = df_in[key_columns].astype({col_now: object for col_now in join_columns})
+    authors_df = papers_df.drop_duplicates(join_columns) \
+                          .merge(authors_df[join_columns + ['Position', 'Author', 'Email', \
+                                                            'Affiliation']], \
+                                 on=join_columns, how='inner')
+
+    return authors_df[key_columns + ['Position', 'Author', 'Email', 'Affiliation']]
+
+# The write_sqlite function writes the tables to a new database file, which
+# replaces db_out once it is complete.
+def write_sqlite(tables_in, db_out):
+    tmp_out = db_out + '.tmp'
+    if os.path.exists(tmp_out):
+        os.remove(tmp_out)
+    connection = sqlite3.connect(tmp_out)
+    try:
+        for table_now, df_now in tables_in.items():
+            df_now.to_sql(table_now, connection, index=False)
+            for col_now in INDEX_COLUMNS:
+                if col_now in df_now.columns:
+                    connection.execute('CREATE INDEX "idx_{0}_{1}" ON "{0}" ("{1}")'.format( \
+                        table_now, col_now))
+        connection.commit()
+    finally:
+        connection.close()
+    os.replace(tmp_out, db_out)
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError('Writing Parquet files requires the pyarrow package, ' \
+                          'which is not installed: run "pip install pyarrow", ' \
+                          'or export to "sqlite" instead') from None
+
+# The write_parquet function writes each table to <dir_out>/<table>.parquet.
+# Columns mixing numbers and text (e.g. "P_id", which is "N/A" for papers
+# without a registration) are written as text.
+def write_parquet(tables_in, dir_out):
+    _require_pyarrow()
+    os.makedirs(dir_out, exist_ok=True)
+    for table_now, df_now in tables_in.items():
+        df_now = df_now.copy()
+        for col_now in df_now.columns[df_now.dtypes == object]:
+            df_now[col_now] = df_now[col_now].astype('string')
+        df_now.to_parquet(os.path.join(dir_out, table_now + '.parquet'), index=False)
+
+def write_xlsx(tables_in, xlsx_out):
+    workbook = create_workbook(xlsx_out)
+    formats = create_status_formats(workbook)
+    for table_now, df_now in tables_in.items():
+        write_df(workbook, table_now, df_now, header_format=formats['header'])
+    workbook.close()
+
+OUTPUT_BACKENDS = {'sqlite': write_sqlite,
+                   'parquet': write_parquet,
+                   'xlsx': write_xlsx}
+
+def write_tables(tables_in, format_in, path_out):
+    OUTPUT_BACKENDS[format_in](tables_in, path_out)
+    print('Exported', ', '.join(tables_in), 'to', path_out)
+
+# The parse_export function is the argparse type of the "--export FORMAT=PATH"
+# option of the scripts. A missing pyarrow package is reported here, before
+# the inputs are read, rather than once everything else has been written.
+def parse_export(export_in):
+    format_in, sep, path_out = export_in.partition('=')
+    if not sep or not path_out:
+        raise argparse.ArgumentTypeError('expected FORMAT=PATH, e.g. ' \
+                                         'sqlite=exported-data/papers.db')
+    if format_in not in OUTPUT_BACKENDS:
+        raise argparse.ArgumentTypeError('unknown format "{}" (choose from {})'.format( \
+            format_in, ', '.join(OUTPUT_BACKENDS)))
+    if format_in == 'parquet':
+        try:
+            _require_pyarrow()
+        except ImportError as err:
+            raise argparse.ArgumentTypeError(str(err))
+
+    return format_in, path_out
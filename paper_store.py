@@ -0,0 +1,303 @@
+import argparse
+import re
+import sys
+import unicodedata
+from array import array
+from collections import defaultdict, namedtuple
+import pandas as pd
+from hotcrp_reader import iter_papers, read_xml_text
+from toc_diff import paper_fingerprint
+from frame_schema import apply_schema
+
+"""
+Description:
+This module keeps the papers of every track read from the HotCRP .xml files
+in a normalized store, instead of collapsing the authors of each paper into
+';'-joined "Author", "Email" and "Affiliation" strings:
+- papers: one StoredPaper record per paper,
+- authors: one StoredAuthor record per person; authors with the same email
+address (see normalize_email) are the same person, even when they are listed
+on papers of different tracks,
+- links: the paper-author link table, held in array-backed columns ("paper",
+"author") with the name, email, affiliation and country exactly as listed on
+that paper. The links of a paper are contiguous and in the order of the author
+list, and "paper_start" holds the position of the first link of each paper.
+
+Two hash indexes map a normalized email address and a normalized author name
+to the authors, so "which papers is this person on" is answered with a couple
+of dictionary lookups, without scanning the joined strings. The joined strings
+are only produced when the data is written out (see joined_field and
+paper_frame).
+
+Example usage:
+    store = build_store({'main': 'data/sample-main-acmcms-toc.xml'})
+    for paper in papers_for_author(store, email='jane.doe@example.org'):
+        print(paper.tag, paper.paper_title)
+
+Syntax: python paper_store.py <path-to-.txt-file-listing-the-.xml-files>
+        (--email <email> | --name <author-name>)
+Example syntax: python paper_store.py data/sample-xml_list.txt
+                --name 'Jane Doe'
+"""
+
+StoredPaper = namedtuple('StoredPaper', ['paper_id',
+                                         'tag',
+                                         'paper_type',
+                                         'paper_title',
+                                         'event_tracking_number'])
+
+StoredAuthor = namedtuple('StoredAuthor', ['author_id', 'name', 'email'])
+
+WHITESPACE_RE = re.compile(r'\s+')
+PAPER_ID_RE = re.compile(r'(\d+)\s*$')
+
+# The normalize_email function returns the form of an email address that is
+# compared when looking authors up: without case or surrounding whitespace,
+# without a "+tag" suffix (e.g. "jane+conf@example.org"), and with the dots of
+# Gmail addresses removed and "googlemail.com" read as "gmail.com".
+def normalize_email(email_in):
+    if not isinstance(email_in, str):
+        return ''
+    email_now = email_in.strip().casefold()
+    local, sep, domain = email_now.rpartition('@')
+    if not sep or not local:
+        return email_now
+    local = local.split('+', 1)[0]
+    if domain == 'googlemail.com':
+        domain = 'gmail.com'
+    if domain == 'gmail.com':
+        local = local.replace('.', '')
+
+    return local + '@' + domain
+
+# The normalize_name function removes accents, case and repeated whitespace
+# from an author name, so that e.g. "José  Pérez" and "jose perez" are looked
+# up as the same name.
+def normalize_name(name_in):
+    if not isinstance(name_in, str):
+        return ''
+    name_now = unicodedata.normalize('NFKD', name_in)
+    name_now = ''.join(c_now for c_now in name_now \
+                       if not unicodedata.combining(c_now))
+
+    return WHITESPACE_RE.sub(' ', name_now.casefold()).strip()
+
+def new_store():
+    return {'papers': [],
+            'authors': [],
+            'links': {'paper': array('l'),
+                      'author': array('l'),
+                      'name': [],
+                      'email': [],
+                      'affiliation': [],
+                      'country': []},
+            'paper_start': array('l'),
+            'author_papers': [],
+            'email_index': {},
+            'name_index': defaultdict(list)}
+
+# The _add_author function returns the id of the author with this email
+# address, adding the author to the store when it is not there yet. Authors
+# without an email address cannot be told apart from namesakes, so each of
+# them gets a record of its own.
+def _add_author(store_in, author_in):
+    email_key = normalize_email(author_in.email)
+    if email_key and email_key in store_in['email_index']:
+        author_id = store_in['email_index'][email_key]
+    else:
+        author_id = len(store_in['authors'])
+        store_in['authors'].append(StoredAuthor(author_id, author_in.name, \
+                                                author_in.email))
+        store_in['author_papers'].append([])
+        if email_key:
+            store_in['email_index'][email_key] = author_id
+    # The same person can be listed under several spellings of their name.
+    name_ids = store_in['name_index'][normalize_name(author_in.name)]
+    if author_id not in name_ids:
+        name_ids.append(author_id)
+
+    return author_id
+
+# The add_track function reads the .xml file of one track into the store.
+# papers_in, when given, holds the Paper records already read from xml_in
+# (e.g. by publication_batch.py for a file shared between conferences), and
+# the file is not read again.
+def add_track(store_in, tag_in, xml_in, papers_in=None):
+    links = store_in['links']
+    for paper in iter_papers(xml_in) if papers_in is None else papers_in:
+        paper_id = len(store_in['papers'])
+        store_in['papers'].append(StoredPaper(paper_id, tag_in, paper.paper_type, \
+                                              paper.paper_title, \
+                                              paper.event_tracking_number))
+        store_in['paper_start'].append(len(links['paper']))
+        for a_author in paper.authors:
+            author_id = _add_author(store_in, a_author)
+            links['paper'].append(paper_id)
+            links['author'].append(author_id)
+            links['name'].append(a_author.name)
+            links['email'].append(a_author.email)
+            links['affiliation'].append(a_author.affiliation)
+            links['country'].append(a_author.country)
+            author_papers = store_in['author_papers'][author_id]
+            if not author_papers or author_papers[-1] != paper_id:
+                author_papers.append(paper_id)
+
+    return store_in
+
+# The build_store function reads every track of a read_xml_text manifest,
+# i.e. a dictionary of {tag: path to the .xml file}. papers_in is an optional
+# dictionary of {path: Paper records already read} (see add_track).
+def build_store(xml_dict, papers_in=None):
+    papers_in = papers_in or {}
+    store = new_store()
+    for tag_now in xml_dict:
+        add_track(store, tag_now, xml_dict[tag_now], papers_in.get(xml_dict[tag_now]))
+
+    return store
+
+# The update_stores function returns a dictionary of {tag: store holding only
+# that track} for the tracks of xml_dict. The stores of stores_in are reused,
+# and only the tracks of stale_tags (or without a store yet) are read, so that
+# in watch mode a changed .xml file only re-reads that track.
+def update_stores(stores_in, xml_dict, stale_tags):
+    return {tag_now: stores_in[tag_now] if tag_now in stores_in and tag_now not in stale_tags \
+            else add_track(new_store(), tag_now, xml_dict[tag_now]) \
+            for tag_now in xml_dict}
+
+def _paper_links(store_in, paper_id):
+    end = store_in['paper_start'][paper_id + 1] \
+        if paper_id + 1 < len(store_in['paper_start']) \
+        else len(store_in['links']['paper'])
+
+    return range(store_in['paper_start'][paper_id], end)
+
+# The find_authors function returns the authors with this email address or
+# this name (or both, when both are given).
+def find_authors(store_in, email=None, name=None):
+    author_ids = []
+    if email is not None:
+        author_id = store_in['email_index'].get(normalize_email(email))
+        if author_id is not None:
+            author_ids.append(author_id)
+    if name is not None:
+        for author_id in store_in['name_index'].get(normalize_name(name), []):
+            if author_id not in author_ids:
+                author_ids.append(author_id)
+
+    return [store_in['authors'][author_id] for author_id in author_ids]
+
+# The papers_for_author function returns the papers of the authors found by
+# find_authors, in the order they were read.
+def papers_for_author(store_in, email=None, name=None):
+    paper_ids = set()
+    for a_author in find_authors(store_in, email=email, name=name):
+        paper_ids.update(store_in['author_papers'][a_author.author_id])
+
+    return [store_in['papers'][paper_id] for paper_id in sorted(paper_ids)]
+
+# The paper_authors function returns the authors of a paper as listed on it,
+# in order, as {"name", "email", "affiliation", "country"} dictionaries.
+def paper_authors(store_in, paper_id):
+    links = store_in['links']
+    return [{field_now: links[field_now][link_now] \
+             for field_now in ('name', 'email', 'affiliation', 'country')} \
+            for link_now in _paper_links(store_in, paper_id)]
+
+# The joined_field function produces the ';'-joined string of one paper that
+# the scripts write to the .xlsx and .csv files: field_in is "name", "email",
+# "affiliation" or "country". Countries are listed once each, in the order of
+# the authors.
+def joined_field(store_in, paper_id, field_in, sep=';'):
+    links = store_in['links']
+    values = [links[field_in][link_now] for link_now in _paper_links(store_in, paper_id)]
+    if field_in == 'country':
+        values = list(dict.fromkeys([value_now for value_now in values \
+                                     if str(value_now) != 'None']))
+
+    return sep.join(values)
+
+# The paper_number function returns the paper number at the end of an
+# "event_tracking_number", e.g. "2" for "eenergy20-p2", or None.
+def paper_number(event_tracking_number):
+    id_match = PAPER_ID_RE.search(event_tracking_number or '')
+
+    return id_match.group(1) if id_match else None
+
+# The paper_frame function returns one row per paper, with the same columns as
+# create_trackdf in publication_registration_status.py.
+def paper_frame(store_in, tags_in=None):
+    paper_list = []
+    for paper in store_in['papers']:
+        if tags_in is not None and paper.tag not in tags_in:
+            continue
+        paper_list.append([paper.paper_type,
+                           paper.paper_title,
+                           joined_field(store_in, paper.paper_id, 'name'),
+                           joined_field(store_in, paper.paper_id, 'email'),
+                           joined_field(store_in, paper.paper_id, 'affiliation'),
+                           joined_field(store_in, paper.paper_id, 'country'),
+                           paper.tag,
+                           paper_number(paper.event_tracking_number)])
+
+    return apply_schema(pd.DataFrame(paper_list, columns=['Type',
+                                                          'P_title',
+                                                          'Author',
+                                                          'Email',
+                                                          'Affiliation',
+                                                          'Country',
+                                                          'Tag',
+                                                          'Id']))
+
+# The track_frames function returns a dictionary of {tag: paper_frame of the
+# track} for the tracks of tags_in, from a single pass over the papers of the
+# store rather than one pass per track.
+def track_frames(store_in, tags_in):
+    paper_df = paper_frame(store_in)
+    track_groups = {tag_now: track_df.reset_index(drop=True) for tag_now, track_df \
+                    in paper_df.groupby('Tag', observed=True, sort=False)}
+
+    return {tag_now: track_groups.get(tag_now, paper_df.iloc[:0]) for tag_now in tags_in}
+
+def _paper_fingerprint(store_in, paper):
+    links = store_in['links']
+    return paper_fingerprint(paper.paper_type, paper.paper_title, \
+                             [(links['name'][link_now], links['affiliation'][link_now], \
+                               links['country'][link_now], links['email'][link_now]) \
+                              for link_now in _paper_links(store_in, paper.paper_id)])
+
+# The hotcrp_frame function returns one row per paper of the given tracks,
+# with the same columns as create_hotcrp_df in publication_checklist.py.
+# preambles_in maps each track to the preamble of its "event_tracking_number".
+def hotcrp_frame(store_in, preambles_in):
+    paper_list = []
+    for paper in store_in['papers']:
+        if paper.tag not in preambles_in:
+            continue
+        paper_list.append([paper.event_tracking_number.split(preambles_in[paper.tag])[1].rstrip(),
+                           paper.paper_type,
+                           paper.paper_title,
+                           joined_field(store_in, paper.paper_id, 'name'),
+                           joined_field(store_in, paper.paper_id, 'email'),
+                           _paper_fingerprint(store_in, paper)])
+
+    return apply_schema(pd.DataFrame(paper_list, columns=['Id', 'Type', 'P_title', 'Author', \
+                                                          'Email', 'Fingerprint']))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='List the papers of an ' \
+                                     'author, looked up by email or name.')
+    parser.add_argument('xml_list', help='.txt file listing the .xml files ' \
+                        'produced by HotCRP')
+    parser.add_argument('--email', help='email address of the author')
+    parser.add_argument('--name', help='name of the author')
+    args = parser.parse_args()
+    if args.email is None and args.name is None:
+        parser.error('give --email and/or --name')
+
+    paper_store = build_store(read_xml_text(args.xml_list))
+    found_papers = papers_for_author(paper_store, email=args.email, name=args.name)
+    if not found_papers:
+        print('No papers found')
+        sys.exit(1)
+    for paper in found_papers:
+        print(paper.tag, paper.event_tracking_number, paper.paper_title, sep='\t')
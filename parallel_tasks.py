@@ -0,0 +1,49 @@
+"""
+Description:
+This module runs the same function over several inputs (e.g. the tracks of a
+conference, the camera-ready archives of the papers or the conferences of a
+batch), either one at a time in this process or in a pool of worker
+processes, as chosen with the --jobs option of the scripts.
+
+The results are always returned in the order of the inputs, so the output of
+a script does not depend on the number of jobs. An input that fails does not
+stop the others: its exception is returned instead of its result, and the
+caller decides whether to report it and carry on or to stop.
+
+The function and its arguments are sent to the worker processes, so the
+function must be defined at the top level of a module. The worker pool is only
+imported when it is used, as it takes longer to import than the rest of some
+of the scripts.
+
+Example usage:
+    frames, errors = run_parallel(load_track, {'main': ('main.xml',),
+                                               'poster': ('poster.xml',)}, jobs=2)
+"""
+
+# The run_parallel function runs fn_in(*args) for each {key: args} of
+# tasks_in, in up to jobs worker processes (in this process when jobs is 1 or
+# there is a single task), and returns a dictionary of {key: result} for the
+# tasks that succeeded and {key: exception} for those that failed, both in the
+# order of tasks_in.
+def run_parallel(fn_in, tasks_in, jobs=1):
+    results = {}
+    errors = {}
+
+    def _collect(key_now, run_fn):
+        try:
+            results[key_now] = run_fn()
+        except Exception as err:
+            errors[key_now] = err
+
+    if jobs > 1 and len(tasks_in) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks_in))) as executor:
+            futures = {key_now: executor.submit(fn_in, *args_now) \
+                       for key_now, args_now in tasks_in.items()}
+            for key_now in tasks_in:
+                _collect(key_now, futures[key_now].result)
+    else:
+        for key_now, args_now in tasks_in.items():
+            _collect(key_now, lambda: fn_in(*args_now))
+
+    return results, errors
@@ -0,0 +1,148 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import pandas as pd
+
+"""
+Description:
+This module keeps an on-disk cache of the dataframes produced by parsing the
+input files (the .xml files produced by HotCRP and the .csv file produced by
+ACM), so that regenerating the .xlsx files does not re-parse inputs that have
+not changed.
+
+Each cache entry is keyed by:
+- the SHA-256 hash of the contents of the input file,
+- the name and version of the parser that produced the dataframe,
+- any extra arguments passed to the parser (e.g. the "event_tracking_number"
+preamble or the track tag).
+Renaming or touching an input file therefore does not invalidate its entry,
+while editing it (or bumping the parser version) does.
+
+The dataframes are stored with pandas' pickle format, which keeps every column
+as a contiguous binary block and loads much faster than re-parsing XML or CSV.
+The total size of the cache is capped at CACHE_MAX_BYTES; when the cap is
+exceeded, the least recently used entries are deleted first.
+
+The cache lives in ~/.cache/acm-publication-assist unless the
+ACM_ASSIST_CACHE_DIR environment variable points somewhere else.
+"""
+
+CACHE_DIR = os.environ.get('ACM_ASSIST_CACHE_DIR',
+                           os.path.join(os.path.expanduser('~'),
+                                        '.cache',
+                                        'acm-publication-assist'))
+CACHE_MAX_BYTES = 256 * 1024 * 1024
+CACHE_SUFFIX = '.pkl'
+
+# The total size of the entries of each cache directory, as last listed by
+# this process plus the entries it stored since. The directory is only listed
+# again when this total exceeds the cap.
+_cache_bytes = {}
+
+# The file_digest function returns the SHA-256 hash of the contents of a file,
+# reading it in blocks so that large inputs are not loaded into memory.
+def file_digest(file_in):
+    digest = hashlib.sha256()
+    with open(file_in, 'rb') as f_in:
+        for block in iter(lambda: f_in.read(1 << 20), b''):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+# The cache_key function combines the hash of the input file with the parser
+# name, parser version and extra parser arguments into a single cache key.
+def cache_key(file_in, parser_name, parser_version, *args_in):
+    key_parts = [file_digest(file_in), parser_name, str(parser_version)]
+    key_parts.extend(str(arg_in) for arg_in in args_in)
+
+    return hashlib.sha256('\0'.join(key_parts).encode('utf-8')).hexdigest()
+
+def _entry_path(key_in, cache_dir):
+    return os.path.join(cache_dir, key_in + CACHE_SUFFIX)
+
+# The _evict function deletes the least recently used entries of cache_dir
+# until their total size is at most max_bytes, and returns that total.
+def _evict(cache_dir, max_bytes):
+    entries = []
+    for f_name in os.listdir(cache_dir):
+        if not f_name.endswith(CACHE_SUFFIX):
+            continue
+        f_path = os.path.join(cache_dir, f_name)
+        # Another worker process may have evicted the entry in the meantime
+        try:
+            f_stat = os.stat(f_path)
+        except FileNotFoundError:
+            continue
+        entries.append((f_stat.st_mtime, f_stat.st_size, f_path))
+
+    total_bytes = sum(entry[1] for entry in entries)
+    # The modification time is bumped on every hit, so the oldest entries are
+    # the least recently used ones.
+    for _, f_size, f_path in sorted(entries):
+        if total_bytes <= max_bytes:
+            break
+        try:
+            os.remove(f_path)
+        except FileNotFoundError:
+            # Already evicted by another worker process, which freed its size
+            pass
+        total_bytes -= f_size
+
+    return total_bytes
+
+# The load_cached function returns the dataframe stored under key_in, or None
+# if there is no such entry.
+def load_cached(key_in, cache_dir=CACHE_DIR):
+    f_path = _entry_path(key_in, cache_dir)
+    try:
+        df_out = pd.read_pickle(f_path)
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        return None
+    # The entry may have been evicted by another process since it was read
+    try:
+        os.utime(f_path)
+    except FileNotFoundError:
+        pass
+
+    return df_out
+
+# The store_cached function writes df_in to the cache under key_in and evicts
+# the least recently used entries if the cache grows beyond max_bytes. The
+# entry is written to a temporary file of its own first, so that processes
+# storing the same entry at once never write to the same file.
+def store_cached(key_in, df_in, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+    os.makedirs(cache_dir, exist_ok=True)
+    if cache_dir not in _cache_bytes:
+        _cache_bytes[cache_dir] = _evict(cache_dir, max_bytes)
+
+    f_path = _entry_path(key_in, cache_dir)
+    fd_tmp, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=cache_dir)
+    try:
+        with os.fdopen(fd_tmp, 'wb') as f_out:
+            df_in.to_pickle(f_out)
+        os.replace(tmp_path, f_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    _cache_bytes[cache_dir] += os.path.getsize(f_path)
+    if _cache_bytes[cache_dir] > max_bytes:
+        _cache_bytes[cache_dir] = _evict(cache_dir, max_bytes)
+
+# The cached_frame function returns parse_fn(file_in, *args_in), reusing the
+# cached dataframe when file_in has been parsed before by the same parser
+# version. Set use_cache to False to bypass the cache entirely.
+def cached_frame(file_in, parser_name, parser_version, parse_fn, *args_in,
+                 use_cache=True, cache_dir=CACHE_DIR,
+                 max_bytes=CACHE_MAX_BYTES):
+    if not use_cache:
+        return parse_fn(file_in, *args_in)
+
+    key_now = cache_key(file_in, parser_name, parser_version, *args_in)
+    df_out = load_cached(key_now, cache_dir)
+    if df_out is None:
+        df_out = parse_fn(file_in, *args_in)
+        store_cached(key_now, df_out, cache_dir, max_bytes)
+
+    return df_out
@@ -0,0 +1,185 @@
+import argparse
+import json
+import os
+from hotcrp_reader import iter_papers
+from parallel_tasks import run_parallel
+from paper_store import build_store, track_frames, hotcrp_frame
+from publication_registration_status import read_xml_text, create_googledf, \
+    build_regstatus
+import publication_checklist
+import publication_registration_status
+
+"""
+Description:
+This script produces the checklist .xlsx file (see publication_checklist.py)
+and the registration status .xlsx file (see
+publication_registration_status.py) of several conferences in one run, from a
+.json manifest listing the inputs of each conference.
+
+Each .xml file is read exactly once for the whole batch, even when it is
+listed by several conferences, and the dataframes of both .xlsx files of a
+conference are produced from a paper store (see paper_store.py) built from the
+papers read. The conferences are independent of each other, so with --jobs N they
+are processed in up to N worker processes at the same time. A conference that
+fails is reported and does not stop the others.
+
+The manifest contains a list of conferences, e.g.
+{
+  "conferences": [
+    {
+      "name": "eenergy20",
+      "xml_list": "data/sample-xml_list.txt",
+      "preambles": {"main": "eenergy20-p"},
+      "acm_csv": "data/sample-acm-cms-export.csv",
+      "form_csv": "data/sample-google-form.csv",
+      "output_dir": "exported-data/eenergy20"
+    }
+  ]
+}
+where:
+- name: the name of the conference, used to name the .xlsx files
+- xml_list: the .txt file listing the .xml files produced by HotCRP, as given
+to publication_registration_status.py
+- preambles: the tracks whose papers are checked against the ACM .csv file,
+with the preamble found in the .xml file for the field "event_tracking_number"
+- acm_csv: the .csv file produced by ACM (optional: without it, no checklist
+is written)
+- form_csv: the .csv file produced by Google forms (optional: without it, no
+registration status is written)
+- output_dir: where "<name>-checklist.xlsx" and
+"<name>-registration-status.xlsx" are written
+
+Syntax: python publication_batch.py <path-to-.json-manifest> [--jobs N]
+        [--no-cache]
+Example syntax: python publication_batch.py data/sample-batch-manifest.json
+"""
+
+# The read_manifest function reads the list of conferences from the .json
+# manifest and checks that each of them has the required fields.
+def read_manifest(manifest_in):
+    with open(manifest_in) as f_in:
+        conferences = json.load(f_in)['conferences']
+    for conf_now in conferences:
+        missing = [field_now for field_now in ('name', 'xml_list', 'output_dir') \
+                   if field_now not in conf_now]
+        if missing:
+            raise ValueError('Conference {} in {} has no {}'.format( \
+                conf_now.get('name', '?'), manifest_in, ', '.join(missing)))
+        if conf_now.get('acm_csv') and not conf_now.get('preambles'):
+            raise ValueError('Conference {} in {} has an ACM .csv file but ' \
+                             'no preambles'.format(conf_now['name'], manifest_in))
+
+    return conferences
+
+def _read_papers(xml_in):
+    return list(iter_papers(xml_in))
+
+# The read_tracks function reads every .xml file listed by the conferences,
+# once per file even when several conferences list it, in up to jobs worker
+# processes, and returns a dictionary of {name: {real path: Paper records}} so
+# each conference is only handed its own tracks. The files (and .txt files)
+# that cannot be read are left out, so the conferences listing them fail with
+# the error of reading them in run_conference.
+def read_tracks(conferences_in, jobs=1):
+    conf_paths = {}
+    for conf_now in conferences_in:
+        try:
+            xml_dict = read_xml_text(conf_now['xml_list'])
+        except (OSError, ValueError):
+            xml_dict = {}
+        conf_paths[conf_now['name']] = [os.path.realpath(xml_now) \
+                                        for xml_now in xml_dict.values()]
+    xml_paths = dict.fromkeys(xml_now for paths_now in conf_paths.values() \
+                              for xml_now in paths_now)
+    track_papers, _ = run_parallel(_read_papers, {xml_now: (xml_now,) \
+                                                  for xml_now in xml_paths}, jobs)
+
+    return {name_now: {xml_now: track_papers[xml_now] for xml_now in paths_now \
+                       if xml_now in track_papers} \
+            for name_now, paths_now in conf_paths.items()}
+
+# The run_conference function writes the .xlsx files of one conference and
+# returns the paths of the files written. track_papers_in holds the papers of
+# the conference read by read_tracks; the .xml files missing from it are read
+# here.
+def run_conference(conf_in, use_cache=True, track_papers_in=None):
+    track_papers_in = track_papers_in or {}
+    xml_dict = read_xml_text(conf_in['xml_list'])
+    paper_store = build_store(xml_dict, \
+                              {xml_now: track_papers_in[os.path.realpath(xml_now)] \
+                               for xml_now in xml_dict.values() \
+                               if os.path.realpath(xml_now) in track_papers_in})
+    os.makedirs(conf_in['output_dir'], exist_ok=True)
+    outputs = []
+
+    if conf_in.get('acm_csv'):
+        checklist_out = os.path.join(conf_in['output_dir'], \
+                                     conf_in['name'] + '-checklist.xlsx')
+        hotcrp_df = hotcrp_frame(paper_store, conf_in['preambles'])
+        acm_df = publication_checklist.create_acm_df(conf_in['acm_csv'], \
+                                                     use_cache=use_cache)
+        df_all = publication_checklist.create_merged_df( \
+            acm_in=acm_df, \
+            hotcrp_in=hotcrp_df, \
+            columns_in=publication_checklist.COLUMNS_ADD, \
+            how_join='inner')
+        publication_checklist.write_to_excel( \
+            df_all, checklist_out, publication_checklist.COLUMNS_ADD, \
+            publication_checklist.paper_fingerprints( \
+                hotcrp_df, publication_checklist.acm_fingerprints(df_all, acm_df)))
+        outputs.append(checklist_out)
+
+    if conf_in.get('form_csv'):
+        regstatus_out = os.path.join(conf_in['output_dir'], \
+                                     conf_in['name'] + '-registration-status.xlsx')
+        paper_dict = track_frames(paper_store, xml_dict)
+        regstatus = build_regstatus(xml_dict, paper_dict, create_googledf(conf_in['form_csv']))
+        publication_registration_status.write_to_excel( \
+            regstatus['papermerged_df'], regstatus['piv_tagtypedf'], \
+            regstatus['paperreg_summarydf'], regstatus['paperreg_df_by_type'], \
+            regstatus['paperreg_unregdf'], regstatus_out, regstatus['paperreg_countrydf'])
+        outputs.append(regstatus_out)
+
+    return outputs
+
+# The run_batch function reads the .xml files of every conference (see
+# read_tracks), runs every conference, in up to jobs worker processes, and
+# returns a dictionary of {name: paths written} for the conferences that
+# succeeded and {name: error} for those that failed.
+def run_batch(conferences_in, jobs=1, use_cache=True):
+    track_papers = read_tracks(conferences_in, jobs)
+    written, errors = run_parallel(run_conference, \
+                                   {conf_now['name']: (conf_now, use_cache, \
+                                                        track_papers[conf_now['name']]) \
+                                    for conf_now in conferences_in}, jobs)
+    failed = {name_now: '{}: {}'.format(type(err).__name__, err) \
+              for name_now, err in errors.items()}
+    for name_now, error_now in failed.items():
+        print('Conference', name_now, 'failed:', error_now)
+
+    return written, failed
+
+# The main function runs the script (see acm_assist.py).
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(description='Create the checklist and ' \
+                                     'registration status .xlsx files of ' \
+                                     'several conferences.', prog=prog)
+    parser.add_argument('manifest', help='.json file listing the conferences')
+    parser.add_argument('--jobs', type=int, default=1, metavar='N', \
+                        help='number of conferences to process in parallel')
+    parser.add_argument('--no-cache', action='store_true', \
+                        help='do not reuse or store cached parsed inputs')
+    args = parser.parse_args(argv)
+
+    written, failed = run_batch(read_manifest(args.manifest), jobs=args.jobs, \
+                                use_cache=not args.no_cache)
+    for name_now in written:
+        print(name_now + ':', ', '.join(written[name_now]))
+    if failed:
+        print(len(failed), 'conference(s) failed:', ', '.join(failed))
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,7 +1,20 @@
-import sys
-import xml.etree.ElementTree as ET
-from xlsxwriter.utility import xl_rowcol_to_cell
+import argparse
+import hashlib
+import json
+import re
 import pandas as pd
+from toc_diff import diff_fingerprints
+from parse_cache import cached_frame
+from title_join import align_titles, report_unmatched, unmatched_reference
+from xlsx_writer import create_workbook, create_status_formats, write_df, \
+    validate_list, highlight_values, column_name
+from watch_inputs import watch_files
+from output_backends import write_tables, author_table, parse_export
+from stage_profiler import new_profile, profile_stage, record_frames, write_report, \
+    print_summary
+from camera_ready_scan import ACM_DOI_URL_RE, prefill_checks
+from frame_schema import apply_schema
+from paper_store import new_store, add_track, hotcrp_frame, update_stores
 pd.options.mode.chained_assignment = None
 
 """
@@ -49,6 +62,30 @@ argv[2]: this points to the .xml file produced by HotCRP
 argv[3]: this is the preamble found in the .xml file for the field
         "event_tracking_number"
 argv[4]: this points to the resulting .xlsx file produced by this script
+--no-cache: re-parse the .csv and .xml files instead of reusing the parsed
+        data cached by a previous run (see parse_cache.py)
+--watch: keep running and regenerate the .xlsx file whenever the .csv or .xml
+        file changes (see watch_inputs.py)
+--export FORMAT=PATH: also write the checklist and its authors to an SQLite
+        database ("sqlite"), a directory of Parquet files ("parquet") or
+        another .xlsx file ("xlsx"); can be given several times (see
+        output_backends.py)
+--update-from <path-to-previous-.xlsx-file>: keep the checks filled in in a
+        checklist written by a previous run, for the papers whose TOC entry
+        has not changed since then (see toc_diff.py). The DOI and ACM
+        reference format checks are only kept if the ACM data of the paper
+        (DOI, copyright and conference) has not changed either. Reading the
+        .xlsx file requires the openpyxl package
+--camera-ready <path-to-directory>: pre-fill the DOI, template, CCS and
+        keywords, email and affiliation, and ACM reference format checks from
+        the camera-ready LaTeX sources, one .zip archive per paper named after
+        the paper ID (see camera_ready_scan.py). Checks that are already
+        filled in, e.g. kept with --update-from, are not changed
+--jobs N: number of .zip archives scanned in parallel with --camera-ready
+--profile <path-to-.json-file>: measure the time used by each stage of the
+        script and write it to a .json report (see stage_profiler.py)
+--profile-memory: with --profile, also measure the peak memory of each
+        stage, which slows the script down
 
 Syntax: python publication-checklist.py <path-to-.csv-file-produced-by-ACM>
         <path-to-.xml-file-from-HotCRP>
@@ -58,69 +95,93 @@ Example syntax: python publication_checklist.py data/sample-acm-cms-export.csv
                 exported-data/sample-checklist.xlsx
 """
 
-def create_acm_df(acm_in):
-    acm_data = pd.read_csv(acm_in)
-    acm_data['P_title'] = acm_data['Title'].apply(lambda x: x.split('\\')[0].split('full strip notes')[0].rstrip())
-    acm_data['Type'] = acm_data['Rights Granted'].apply(lambda x: x.split('pdf')[0].rstrip())
-    acm_sdata = acm_data[['P_title', 'DOI']]
+# The check columns added to the .xlsx file, to be filled in by hand. The
+# "Overall_check" column is computed from the others.
+COLUMNS_ADD = ['DOI_check',
+               'Template_check',
+               'CCS_Keyword_check',
+               'Email_affiliation_check',
+               'ACM_ref_check',
+               'Author_header_check',
+               'Track_title_check',
+               'Overall_check']
 
-    return acm_sdata
+# Bump these whenever create_acm_df or create_hotcrp_df produce a different
+# dataframe, so that stale entries in the parse cache are not reused.
+ACM_PARSER_VERSION = 3
+HOTCRP_PARSER_VERSION = 3
 
-def create_hotcrp_df(xml_in, handle_in):
+# Number of rows of the ACM .csv file that are read and processed at a time.
+ACM_CHUNK_ROWS = 5000
+
+# The "Title" column of the ACM .csv file holds the paper title followed by the
+# LaTeX commands that ACM asks the authors to paste into their paper, e.g.
+# "<title> \setcopyright{acmlicensed}\acmConference[e-Energy'20]{<name>}{<date>}
+# {<venue>}\acmBooktitle{...}\acmPrice{15.00}\acmDOI{10.1145/...} full strip notes".
+# Each command is optional and is captured inside its own lookahead, so all the
+# fields are extracted with a single match per row whatever their order.
+ACM_TITLE_RE = re.compile(
+    r'^(?P<P_title>[^\\]*?)\s*(?=\\|full strip notes|$)'
+    r'(?=(?:.*?\\setcopyright\{(?P<Copyright>[^}]*)\})?)'
+    r'(?=(?:.*?\\acmConference(?:\[(?P<Conference_short>[^\]]*)\])?'
+    r'\{(?P<Conference>[^}]*)\})?)'
+    r'(?=(?:.*?\\acmPrice\{(?P<Price>[^}]*)\})?)'
+    r'(?=(?:.*?\\acmDOI\{(?P<ACM_DOI>[^}]*)\})?)',
+    re.DOTALL)
+ACM_RIGHTS_RE = re.compile(r'^(?P<ACM_type>.*?)\s*(?:pdf.*)?$', re.DOTALL)
+
+# The create_acm_df function reads the .csv file produced by ACM in chunks and
+# returns one row per paper with:
+# - P_title: the paper title, without the LaTeX commands
+# - DOI: the DOI URL listed by ACM
+# - ACM_type: the paper type from the "Rights Granted" column
+# - Copyright, Conference_short, Conference, Price, ACM_DOI: the values of the
+# \setcopyright, \acmConference, \acmPrice and \acmDOI commands
+# - DOI_match: whether the \acmDOI value is the DOI listed by ACM
+def create_acm_df(acm_in, use_cache=False):
+    def _parse_chunk(acm_chunk):
+        acm_sdata = acm_chunk['Title'].str.extract(ACM_TITLE_RE)
+        acm_sdata['DOI'] = acm_chunk['DOI']
+        acm_sdata['ACM_type'] = acm_chunk['Rights Granted'].str.extract(ACM_RIGHTS_RE)['ACM_type']
+        acm_sdata['Price'] = pd.to_numeric(acm_sdata['Price'], errors='coerce')
+        doi_listed = acm_sdata['DOI'].str.extract(ACM_DOI_URL_RE)['DOI']
+        acm_sdata['DOI_match'] = (doi_listed == acm_sdata['ACM_DOI']).fillna(False)
+
+        return acm_sdata[['P_title', 'DOI', 'ACM_type', 'Copyright', \
+                          'Conference_short', 'Conference', 'Price', \
+                          'ACM_DOI', 'DOI_match']]
+
+    def _parse_acm(acm_in):
+        acm_chunks = pd.read_csv(acm_in, usecols=['Title', 'Rights Granted', 'DOI'], \
+                                 dtype=str, chunksize=ACM_CHUNK_ROWS)
+        acm_sdata = pd.concat([_parse_chunk(acm_chunk) for acm_chunk in acm_chunks], \
+                              ignore_index=True)
+
+        return apply_schema(acm_sdata)
+
+    return cached_frame(acm_in, 'create_acm_df', ACM_PARSER_VERSION, \
+                        _parse_acm, use_cache=use_cache)
+
+def create_hotcrp_df(xml_in, handle_in, use_cache=False):
     """
     handle_in is the preamble used in <event_tracking_number> of the .xml file.
     Unfortunately this cannot be automated.
+    The "Fingerprint" column identifies the content of each paper in the TOC
+    (see toc_diff.py).
     """
 
-    def _read_xml(xml_in):
-        tree = ET.parse(xml_in)
-        xml_out = tree.getroot()
-
-        return xml_out
-
-    def _flatten_list(list_in):
-        flattened_string = ';'.join(list_in)
-
-        return flattened_string
-
-    def _create_email_list(list_in):
-        l_email = ';'.join(list_in)
-
-        return l_email
-
-    paper_list = []
-    xml_data = _read_xml(xml_in)
-    for member in xml_data.findall('paper'):
-        paper_type = member.find('paper_type').text
-        paper_title = member.find('paper_title').text
-        paper_number = member.find('event_tracking_number').text
-        paper_number = paper_number.split(handle_in)[1].rstrip()
-        for author_in in member.findall('authors'):
-            author_names = []
-            author_emails = []
-            for a_author in author_in.findall('author'):
-                a_count = 0
-                f_name = a_author.find('first_name').text
-                m_name = a_author.find('middle_name').text
-                l_name = a_author.find('last_name').text
-                if m_name is None:
-                    a_name = f_name + " " + l_name
-                else:
-                    a_name = f_name + " " + m_name + " " + l_name
-                author_names.append(a_name)
-                a_email = a_author.find('email_address').text
-                author_emails.append(a_email)
-                a_count += 1
-        paper_authors = _flatten_list(author_names)
-        paper_emails = _create_email_list(author_emails)
-        paper_list.append([paper_number,
-                           paper_type,
-                           paper_title,
-                           paper_authors, paper_emails])
-    hotcrp_data = pd.DataFrame(paper_list, \
-                            columns=['Id', 'Type', 'P_title', 'Author', 'Email'])
-    return hotcrp_data
+    # The track is read into a paper store of its own (see paper_store.py);
+    # handle_in only serves as its tag.
+    def _parse_hotcrp(xml_in, handle_in):
+        return hotcrp_frame(add_track(new_store(), handle_in, xml_in), {handle_in: handle_in})
 
+    return cached_frame(xml_in, 'create_hotcrp_df', HOTCRP_PARSER_VERSION, \
+                        _parse_hotcrp, handle_in, use_cache=use_cache)
+
+# The create_merged_df function joins the ACM and HotCRP dataframes on the
+# paper title. The ACM titles are first aligned to the HotCRP titles (see
+# title_join.py), so that differences in case, punctuation or whitespace do not
+# drop papers from the join; titles that could not be matched are printed.
 def create_merged_df(acm_in, hotcrp_in, columns_in, how_join):
 
     def _add_columns(df_in, col_list):
@@ -129,6 +190,10 @@ def create_merged_df(acm_in, hotcrp_in, columns_in, how_join):
 
         return df_in
 
+    acm_in, acm_unmatched = align_titles(hotcrp_in, acm_in)
+    report_unmatched('ACM', acm_unmatched)
+    report_unmatched('HotCRP', unmatched_reference(hotcrp_in, acm_in))
+
     if how_join == 'outer':
         if len(acm_in) == len(hotcrp_in):
             df_temp = pd.merge(acm_in, hotcrp_in, on='P_title', how=how_join)
@@ -149,72 +214,254 @@ def create_merged_df(acm_in, hotcrp_in, columns_in, how_join):
         df_out = _add_columns(df_temp2, columns_in)
         return df_out
 
-def write_to_excel(df_in, filetosave, columns_in):
-    writer = pd.ExcelWriter(filetosave,
-                            engine='xlsxwriter',
-                            options={'strings_to_urls': False,
-                                     'strings_to_numbers':True})
-    df_in.to_excel(writer, sheet_name='Sheet1', index=False)
-    workbook = writer.book
-    worksheet = writer.sheets['Sheet1']
+# The write_to_excel function writes the merged dataframe to the .xlsx file.
+# The "Overall_check" column is filled with a single array formula that
+# produces "FAIL" for the rows where any of the check columns is "FALSE"
+# (whether typed as text or picked from the list, which Excel stores as the
+# logical value), and "OK" otherwise. The fingerprints of
+# the papers, when given (see paper_fingerprints), are written to a hidden
+# sheet, to be read back by carry_over_checks.
+def write_to_excel(df_in, filetosave, columns_in, fingerprints_in=None):
+    workbook = create_workbook(filetosave)
+    formats = create_status_formats(workbook)
     last_col_idx = len(df_in.columns)
     overallstat_idx = df_in.columns.get_loc('Overall_check')
+    check_start = last_col_idx - len(columns_in)
+    check_end = last_col_idx - 2
 
-    # Add a format. Light red fill with dark red text.
-    format1 = workbook.add_format({'bg_color': '#FFC7CE',
-                                   'font_color': '#9C0006'})
-
-    # Add a format. Green fill with dark green text.
-    format2 = workbook.add_format({'bg_color': '#C6EFCE',
-                                   'font_color': '#006100'})
-
-    for row_now in range(1, len(df_in)+1):
-        cell_compute = xl_rowcol_to_cell(row_now, overallstat_idx)
-        cell_start = xl_rowcol_to_cell(row_now, last_col_idx - len(columns_in))
-        cell_end = xl_rowcol_to_cell(row_now, last_col_idx-2)
-        formula_str = '=IF(COUNTIF('+cell_start+':'+cell_end+', "FALSE") > 0, "FAIL", "OK")'
-        worksheet.write_formula(cell_compute, formula_str)
-        worksheet.data_validation(cell_start + ':' + cell_end, \
-                                  {'validate': 'list', \
-                                  'source':['FALSE', 'OK'], \
-                                  'error_message':'The value to be entered must be either "FALSE" or "OK"'})
-
-    cell_compute_start = xl_rowcol_to_cell(1, last_col_idx-1)
-    cell_compute_end = xl_rowcol_to_cell(len(df_in), last_col_idx-1)
-
-    worksheet.conditional_format(cell_compute_start + ':' + cell_compute_end, \
-                                 {'type': 'cell', \
-                                 'criteria': 'equal to', \
-                                 'value':'"FAIL"', \
-                                 'format': format1})
-    worksheet.conditional_format(cell_compute_start + ':' + cell_compute_end, \
-                                 {'type': 'cell', \
-                                 'criteria': 'equal to', \
-                                 'value':'"OK"', \
-                                 'format': format2})
-
-    writer.save()
+    # The number of "FALSE" cells of each row is the product of the matrix
+    # of the check cells being "FALSE" with a column of ones
+    checks = column_name(check_start) + '{first_row}:' + column_name(check_end) + '{last_row}'
+    ones = 'TRANSPOSE(COLUMN(' + column_name(check_start) + '{first_row}:' + \
+           column_name(check_end) + '{first_row})^0)'
+    formula_str = '=IF(MMULT((' + checks + '="FALSE")+(' + checks + '=FALSE)*(' + checks + \
+                  '<>""),' + ones + ')>0,"FAIL","OK")'
+    worksheet = write_df(workbook, 'Sheet1', df_in, \
+                         formulas={'Overall_check': formula_str}, \
+                         header_format=formats['header'])
+    validate_list(worksheet, check_start, check_end, len(df_in), \
+                  ['FALSE', 'OK'], \
+                  'The value to be entered must be either "FALSE" or "OK"')
+    highlight_values(worksheet, overallstat_idx, len(df_in), \
+                     [('"FAIL"', formats['bad']), ('"OK"', formats['good'])])
+    if fingerprints_in is not None:
+        _write_fingerprints(workbook, fingerprints_in)
 
-if __name__ == "__main__":
-    # Create a dataframe using the ACM-produced .csv file
-    acm_df = create_acm_df(acm_in=sys.argv[1])
+    workbook.close()
+
+# The fingerprints of the papers listed in a checklist are written to its
+# hidden FINGERPRINTS_SHEET: for each paper ID, the fingerprint of its TOC
+# entry and the fingerprint of its ACM data (empty when the paper is not
+# listed by ACM).
+FINGERPRINTS_SHEET = 'Fingerprints'
+FINGERPRINTS_COLUMNS = ['Id', 'TOC_fingerprint', 'ACM_fingerprint']
+
+# The ACM columns the ACM data fingerprint is computed from, and the checks
+# that compare the paper with them.
+ACM_FINGERPRINT_COLUMNS = ['DOI', 'ACM_DOI', 'Copyright', 'Conference']
+ACM_CHECK_COLUMNS = ['DOI_check', 'ACM_ref_check']
+
+# The acm_fingerprints function returns a dictionary of {paper ID: fingerprint
+# of the ACM data of the paper} for the papers of the merged dataframe df_in.
+def acm_fingerprints(df_in, acm_in):
+    acm_in, _ = align_titles(df_in, acm_in)
+    acm_in = acm_in.drop_duplicates('P_title').set_index('P_title')
+    paper_acm = df_in[['Id', 'P_title']].join(acm_in[ACM_FINGERPRINT_COLUMNS], on='P_title')
+
+    fingerprints = {}
+    for row_now in paper_acm.itertuples(index=False):
+        acm_fields = [None if pd.isna(value_now) else str(value_now) for value_now in row_now[2:]]
+        fields_json = json.dumps(acm_fields, ensure_ascii=False, separators=(',', ':'))
+        fingerprints[row_now.Id] = hashlib.blake2b(fields_json.encode('utf-8'), \
+                                                   digest_size=16).hexdigest()
+
+    return fingerprints
+
+# The paper_fingerprints function returns a dictionary of {paper ID: (TOC
+# fingerprint, ACM data fingerprint)} for the papers of hotcrp_in.
+def paper_fingerprints(hotcrp_in, acm_fingerprints_in):
+    return {id_now: (fingerprint_now, acm_fingerprints_in.get(id_now)) \
+            for id_now, fingerprint_now in zip(hotcrp_in['Id'], hotcrp_in['Fingerprint'])}
+
+# The fingerprints are written as text, as the workbook converts the strings
+# that look like numbers (e.g. the paper IDs) to numbers.
+def _write_fingerprints(workbook, fingerprints_in):
+    worksheet = workbook.add_worksheet(FINGERPRINTS_SHEET)
+    worksheet.write_row(0, 0, FINGERPRINTS_COLUMNS)
+    for row_now, (id_now, fingerprints_now) in enumerate(fingerprints_in.items(), 1):
+        for col_now, value_now in enumerate((id_now,) + tuple(fingerprints_now)):
+            if value_now is not None:
+                worksheet.write_string(row_now, col_now, str(value_now))
+    worksheet.hide()
 
-    # Create a dataframe using the HotCRP-produced .xml file
-    hotcrp_df = create_hotcrp_df(xml_in=sys.argv[2], handle_in=sys.argv[3])
+def _require_openpyxl():
+    try:
+        import openpyxl
+    except ImportError:
+        raise ImportError('Reading the previous checklist requires the openpyxl ' \
+                          'package, which is not installed: run ' \
+                          '"pip install openpyxl"') from None
+
+# The carry_over_checks function copies the checks filled in in a previous
+# checklist into df_in, for the papers whose fingerprint has not changed since
+# the previous checklist was written. The checks of new and changed papers
+# are left empty, as are the ACM_CHECK_COLUMNS of the papers whose ACM data
+# changed, and the "Overall_check" formula is written again anyway.
+def carry_over_checks(df_in, hotcrp_in, acm_fingerprints_in, previous_xlsx, columns_in):
+    _require_openpyxl()
+    try:
+        previous_sheets = pd.read_excel(previous_xlsx, dtype=str, \
+                                        sheet_name=['Sheet1', FINGERPRINTS_SHEET])
+    except ValueError as err:
+        raise ValueError('No fingerprints were found in ' + previous_xlsx + \
+                         ': it was not written by this script, or was ' \
+                         'written by an older version of it') from err
+
+    previous_fingerprints = previous_sheets[FINGERPRINTS_SHEET].fillna('')
+    toc_diff = diff_fingerprints(dict(zip(previous_fingerprints['Id'], \
+                                          previous_fingerprints['TOC_fingerprint'])), \
+                                 dict(zip(hotcrp_in['Id'], hotcrp_in['Fingerprint'])))
+    previous_acm = dict(zip(previous_fingerprints['Id'], previous_fingerprints['ACM_fingerprint']))
+    acm_changed = [id_now for id_now, fingerprint_now in acm_fingerprints_in.items() \
+                   if id_now in previous_acm and previous_acm[id_now] != fingerprint_now]
+    previous_df = previous_sheets['Sheet1'].fillna('').drop_duplicates('Id').set_index('Id')
+
+    cond_keep = df_in['Id'].isin(previous_df.index) & \
+                ~df_in['Id'].isin(toc_diff['added'] + toc_diff['changed'])
+    for col_now in columns_in:
+        if col_now == 'Overall_check' or col_now not in previous_df.columns:
+            continue
+        cond_col = cond_keep & ~df_in['Id'].isin(acm_changed) if col_now in ACM_CHECK_COLUMNS \
+                   else cond_keep
+        df_in.loc[cond_col, col_now] = df_in.loc[cond_col, 'Id'].map(previous_df[col_now])
+
+    print('Kept the checks of', int(cond_keep.sum()), 'papers;', \
+          len(df_in) - int(cond_keep.sum()), 'new or changed papers to check')
+    for change_now in ('added', 'changed', 'removed'):
+        if toc_diff[change_now]:
+            print('  ' + change_now + ':', ', '.join(toc_diff[change_now]))
+    acm_reset = sorted(set(acm_changed) & set(df_in.loc[cond_keep, 'Id']))
+    if acm_reset:
+        print('  ACM data changed, ' + ' and '.join(ACM_CHECK_COLUMNS) + ' to check again:', \
+              ', '.join(acm_reset))
+
+    return df_in
+
+# The refresh_checklist function runs the whole pipeline and writes the .xlsx
+# file. The parsed inputs are kept in state_in, so that in watch mode only the
+# inputs listed in changed are read again (all of them when changed is None).
+# Each stage is measured when a profile is given (see stage_profiler.py).
+def refresh_checklist(args, state_in, changed=None, profile_in=None):
+    if changed is None or args.acm_csv in changed:
+        # Create a dataframe using the ACM-produced .csv file
+        with profile_stage(profile_in, 'acm_csv_load'):
+            state_in['acm_df'] = create_acm_df(acm_in=args.acm_csv, \
+                                               use_cache=not args.no_cache)
+
+    if changed is None or args.hotcrp_xml in changed:
+        # Create a dataframe using the HotCRP-produced .xml file
+        with profile_stage(profile_in, 'xml_parse'):
+            state_in['hotcrp_df'] = create_hotcrp_df(xml_in=args.hotcrp_xml, \
+                                                     handle_in=args.preamble, \
+                                                     use_cache=not args.no_cache)
 
     # Merge the information from ACM and HotCRP
-    COLUMNS_ADD = ['DOI_check',
-                   'Template_check',
-                   'CCS_Keyword_check',
-                   'Email_affiliation_check',
-                   'ACM_ref_check',
-                   'Author_header_check',
-                   'Track_title_check',
-                   'Overall_check']
-    df_all = create_merged_df(acm_in=acm_df,
-                              hotcrp_in=hotcrp_df,
-                              columns_in=COLUMNS_ADD,
-                              how_join='inner')
+    with profile_stage(profile_in, 'merge'):
+        df_all = create_merged_df(acm_in=state_in['acm_df'],
+                                  hotcrp_in=state_in['hotcrp_df'],
+                                  columns_in=COLUMNS_ADD,
+                                  how_join='inner')
+
+    paper_acm_fingerprints = acm_fingerprints(df_all, state_in['acm_df'])
+    if args.update_from:
+        # Keep the checks of the papers that did not change
+        df_all = carry_over_checks(df_all, state_in['hotcrp_df'], paper_acm_fingerprints, \
+                                   args.update_from, COLUMNS_ADD)
+
+    if args.camera_ready:
+        # Fill in the checks that can be read from the LaTeX sources
+        with profile_stage(profile_in, 'camera_ready_scan'):
+            df_all = prefill_checks(df_all, state_in['acm_df'], args.camera_ready, \
+                                    args.preamble, jobs=args.jobs, use_cache=not args.no_cache)
+
+    record_frames(profile_in, {'acm_df': state_in['acm_df'],
+                               'hotcrp_df': state_in['hotcrp_df'],
+                               'df_all': df_all})
 
     # Write the information to .xlsx file
-    write_to_excel(df_all, sys.argv[4], COLUMNS_ADD)
+    with profile_stage(profile_in, 'xlsx_write'):
+        write_to_excel(df_all, args.output_xlsx, COLUMNS_ADD, \
+                       paper_fingerprints(state_in['hotcrp_df'], paper_acm_fingerprints))
+
+    # Write the same tables to the other formats requested. The authors are
+    # listed from the paper store, which keeps each author as listed on the
+    # paper, and is only read again when the .xml file changes
+    if args.export:
+        state_in['paper_stores'] = update_stores( \
+            state_in.get('paper_stores', {}), {'hotcrp': args.hotcrp_xml}, \
+            ['hotcrp'] if changed is None or args.hotcrp_xml in changed else [])
+    for format_now, path_now in args.export or []:
+        with profile_stage(profile_in, 'export_' + format_now):
+            write_tables({'checklist': df_all,
+                          'authors': author_table(state_in['paper_stores'].values(), \
+                                                  df_all, ['Id', 'P_title'])}, \
+                         format_now, path_now)
+
+    return state_in
+
+# The main function runs the script (see acm_assist.py).
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(description='Create the camera-ready ' \
+                                     'checklist .xlsx file from the ACM and ' \
+                                     'HotCRP data.', prog=prog)
+    parser.add_argument('acm_csv', help='.csv file produced by ACM')
+    parser.add_argument('hotcrp_xml', help='.xml file produced by HotCRP')
+    parser.add_argument('preamble', help='preamble found in the .xml file ' \
+                        'for the field "event_tracking_number"')
+    parser.add_argument('output_xlsx', help='resulting .xlsx file')
+    parser.add_argument('--no-cache', action='store_true', \
+                        help='do not reuse or store cached parsed inputs')
+    parser.add_argument('--watch', action='store_true', \
+                        help='keep running and regenerate the .xlsx file ' \
+                        'whenever the .csv or .xml file changes')
+    parser.add_argument('--update-from', metavar='PREVIOUS_XLSX', \
+                        help='keep the checks filled in in this checklist ' \
+                        'for the papers that have not changed')
+    parser.add_argument('--camera-ready', metavar='ARCHIVE_DIR', \
+                        help='pre-fill the checks from the .zip archives of ' \
+                        'the camera-ready LaTeX sources in this directory')
+    parser.add_argument('--jobs', type=int, default=1, metavar='N', \
+                        help='number of archives to scan in parallel')
+    parser.add_argument('--export', action='append', type=parse_export, \
+                        metavar='FORMAT=PATH', help='also write the tables ' \
+                        'to PATH as "sqlite", "parquet" or "xlsx" (can be ' \
+                        'given several times)')
+    parser.add_argument('--profile', metavar='REPORT_JSON', \
+                        help='write the time used by each stage to this ' \
+                        '.json file')
+    parser.add_argument('--profile-memory', action='store_true', \
+                        help='with --profile, also trace the peak memory of ' \
+                        'each stage (this slows the run down, so the times ' \
+                        'measured are higher than without it)')
+    args = parser.parse_args(argv)
+    if args.profile_memory and not args.profile:
+        parser.error('--profile-memory requires --profile')
+    if args.update_from:
+        try:
+            _require_openpyxl()
+        except ImportError as err:
+            parser.error(str(err))
+
+    profile = new_profile('publication_checklist.py', args.profile_memory) \
+        if args.profile else None
+    checklist_state = refresh_checklist(args, {}, profile_in=profile)
+    if profile is not None:
+        write_report(profile, args.profile)
+        print_summary(profile)
+
+    if args.watch:
+        watch_files(lambda: [args.acm_csv, args.hotcrp_xml], \
+                    lambda changed: refresh_checklist(args, checklist_state, changed))
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,24 @@
-import sys
-import xml.etree.ElementTree as ET
+import argparse
+import os
+import pickle
+import tempfile
 import pandas as pd
-from xlsxwriter.utility import xl_rowcol_to_cell
 import numpy as np
+from hotcrp_reader import read_xml_text
+from parallel_tasks import run_parallel
+from parse_cache import cached_frame, file_digest
+from paper_store import new_store, add_track, paper_frame, update_stores, \
+    normalize_email, normalize_name
+from registration_match import match_registrations
+from summary_tables import SummaryTable, count_tables
+from frame_schema import apply_schema
+from title_join import build_title_index, report_unmatched
+from xlsx_writer import create_workbook, create_status_formats, write_df, \
+    highlight_values
+from watch_inputs import watch_files
+from output_backends import write_tables, author_table, parse_export
+from stage_profiler import new_profile, profile_stage, record_frames, write_report, \
+    print_summary
 
 """
 Description:
@@ -34,11 +50,14 @@ Output:
         - Affiliation: author affiliations
         - Country: author countries
         - Tag: track (main, etc)
+        - Id: paper ID (the number at the end of "event_tracking_number")
     - "Summary_By_Types" which provides a summary of the types of paper at each track
     - "RegSummary_by_Tracks" which provides a summary of the registration status
     for each track
     - "Unregistered_Papers" which lists the papers at the conference that have
     not yet registered to present at the conference
+    - "Summary_by_Countries" which provides the number of papers with an author
+    from each country at each track
     - "<tag>_status" which lists all the papers accepted at a particular <tag>
     track, for e.g. "main_status" lists the papers accepted at the main conference
     and contains the following information:
@@ -65,115 +84,256 @@ Syntax: python publication-checklist.py argv[1] argv[2] argv[3]
 argv[1]: this points to the .text file listing the .xml files produced by HotCRP
 argv[2]: this points to the .csv file produced by Google forms
 argv[3]: this points to the resulting .xlsx file produced by this script
+--no-cache: re-parse the .xml files instead of reusing the parsed data cached
+        by a previous run (see parse_cache.py)
+--jobs N: read the .xml files of up to N tracks at the same time, in separate
+        processes (default: 1)
+--split-by-track: write one .xlsx file per track, named
+        "<output-name>-<tag>.xlsx", with the "<tag>_status" sheet and the
+        rows of the summaries of that track; the output .xlsx file then only
+        lists the tracks and links to their files. With --jobs N, up to N
+        files are written at the same time
+--incremental STATE_FILE: keep the merged data in STATE_FILE between runs and
+        only process the Google form rows submitted since the previous run
+--watch: keep running and regenerate the .xlsx file whenever the .txt file,
+        one of the .xml files or the Google form changes (see watch_inputs.py)
+--export FORMAT=PATH: also write the papers, their authors and the
+        registrations to an SQLite database ("sqlite"), a directory of Parquet
+        files ("parquet") or another .xlsx file ("xlsx"); can be given several
+        times (see output_backends.py)
+--profile REPORT_JSON: measure the time used by each stage of the script and
+        write it to a .json report (see stage_profiler.py)
+--profile-memory: with --profile, also measure the peak memory of each
+        stage, which slows the script down
+--duplicates DUPLICATES_CSV: write the Google form rows dropped as duplicates
+        (see create_googledf) to this .csv file
 
 Example syntax: python publication_registration_status.py
                 data/sample-xml_list.txt
                 data/sample-google-form.csv
                 exported-data/sample-registration-status.xlsx"""
 
-def read_xml_text(xml_in):
-    xml_d = {}
-    with open(xml_in) as f_name:
-        for line in f_name:
-            (tag, file_location) = line.split()
-            xml_d[tag] = file_location
-    return xml_d
-
-def create_dictdf(dict_in):
-    def _read_xml(xml_in):
-        tree = ET.parse(xml_in)
-        xml_out = tree.getroot()
-
-        return xml_out
-
-    def _flatten_list(list_in):
-        flattened_string = ';'.join(list_in)
-
-        return flattened_string
-
-    def _create_email_list(list_in):
-        l_email = ';'.join(list_in)
-
-        return l_email
-
-    def _create_df(xml_in, tag_in):
-        paper_list = []
-        xml_data = _read_xml(xml_in)
-        for member in xml_data.findall('paper'):
-            paper_type = member.find('paper_type').text
-            paper_title = member.find('paper_title').text
-            for author_in in member.findall('authors'):
-                author_names = []
-                author_emails = []
-                author_affiliations = []
-                author_countries = []
-                for a_author in author_in.findall('author'):
-                    a_count = 0
-                    f_name = a_author.find('first_name').text
-                    m_name = a_author.find('middle_name').text
-                    l_name = a_author.find('last_name').text
-                    if m_name is None:
-                        a_name = f_name + " " + l_name
-                    else:
-                        a_name = f_name + " " + m_name + " " + l_name
-                    a_affiliation = a_author.find('affiliation').text
-                    a_country = a_author.find('country').text
-                    author_affiliations.append(a_affiliation)
-                    author_names.append(a_name)
-                    author_countries.append(a_country)
-                    a_email = a_author.find('email_address').text
-                    author_emails.append(a_email)
-                    a_count += 1
-            paper_authors = _flatten_list(author_names)
-            paper_emails = _create_email_list(author_emails)
-            paper_affiliations = _flatten_list(author_affiliations)
-            author_countries = list(set([country_x for country_x in \
-                                         author_countries \
-                                         if str(country_x) != 'None']))
-            paper_countries = _flatten_list(author_countries)
-            paper_list.append([paper_type, \
-                               paper_title, \
-                               paper_authors, \
-                               paper_emails, \
-                               paper_affiliations, \
-                               paper_countries, \
-                               tag_in])
-        paper_df = pd.DataFrame(paper_list, columns=['Type',
-                                                     'P_title',
-                                                     'Author',
-                                                     'Email',
-                                                     'Affiliation',
-                                                     'Country',
-                                                     'Tag'])
-        return paper_df
-
-    data_dict = {}
-    for tag_now in dict_in:
-        data_dict[tag_now] = _create_df(dict_in[tag_now], tag_now)
+# Bump this whenever create_trackdf produces a different dataframe for a track,
+# so that stale entries in the parse cache are not reused.
+TRACK_PARSER_VERSION = 4
+
+# The create_trackdf function reads the .xml file of one track into a paper
+# store of its own (see paper_store.py) and returns a dataframe with one row per
+# paper; the ';'-joined author columns are only produced by paper_frame.
+def create_trackdf(xml_in, tag_in):
+    return paper_frame(add_track(new_store(), tag_in, xml_in))
+
+# The _load_trackdf function is run for every track, either in this process or
+# in a worker process, and names the track and file in any error it raises.
+def _load_trackdf(xml_in, tag_in, use_cache):
+    try:
+        return cached_frame(xml_in, 'create_trackdf', TRACK_PARSER_VERSION, \
+                            create_trackdf, tag_in, use_cache=use_cache)
+    except Exception as err:
+        raise RuntimeError('Could not read track "{}" from {}: {}: {}'.format( \
+            tag_in, xml_in, type(err).__name__, err)) from err
+
+# The create_dictdf function returns a dictionary where each key is a track tag
+# from the read_xml_text manifest and each value is the dataframe of that
+# track. With jobs > 1 the tracks are read in a pool of worker processes; the
+# dictionary is always filled in manifest order so the output is the same as
+# when the tracks are read one at a time.
+def create_dictdf(dict_in, use_cache=False, jobs=1):
+    data_dict, errors = run_parallel(_load_trackdf, \
+                                     {tag_now: (dict_in[tag_now], tag_now, use_cache) \
+                                      for tag_now in dict_in}, jobs)
+    # The first track that could not be read stops the run
+    if errors:
+        raise next(iter(errors.values()))
 
     return data_dict
 
-def create_googledf(csv_in):
-    registration_df = pd.read_csv(csv_in, names=['Username', \
-                                                'P_id', \
-                                                'P_title', \
-                                                'Type', \
-                                                'Author_r'], \
-                                  index_col=0, header=0)
-    return registration_df
+# Number of rows of the Google form .csv file that are read and processed at a
+# time.
+FORM_CHUNK_ROWS = 5000
+
+# The _registration_keys function returns, for each row of a chunk of the
+# Google form, a hash of the (paper ID, email, registrant) it registers. The
+# email and name are normalized (see paper_store.py), and each distinct value
+# is only normalized once.
+def _registration_keys(reg_chunk):
+    def _normalized(column_in, normalize_fn):
+        column_in = column_in.astype(object)
+        distinct = column_in.drop_duplicates()
+        return column_in.map(dict(zip(distinct, map(normalize_fn, distinct))))
+
+    key_df = pd.DataFrame({'P_id': reg_chunk['P_id'].astype(str).str.strip() \
+                                   .str.replace(r'\.0$', '', regex=True),
+                           'Username': _normalized(reg_chunk['Username'], normalize_email),
+                           'Author_r': _normalized(reg_chunk['Author_r'], normalize_name)})
+
+    return pd.util.hash_pandas_object(key_df, index=False).to_numpy()
+
+# The create_googledf function reads the .csv file produced by Google forms in
+# chunks and returns one row per registration, indexed by "Timestamp", in the
+# order of the .csv file. Authors often fill in the form more than once for the
+# same paper; only the latest submission (by "Timestamp", then by position in
+# the file) of each (paper ID, email, registrant) is kept, so the memory used
+# grows with the number of distinct registrations rather than with the size
+# of the file. The number of duplicates dropped is printed and, when
+# duplicates_out is given, the rows dropped are written to that .csv file.
+def create_googledf(csv_in, duplicates_out=None):
+    form_columns = ['Username', 'P_id', 'P_title', 'Type', 'Author_r']
+    reg_chunks = pd.read_csv(csv_in, names=form_columns, index_col=0, header=0, \
+                             chunksize=FORM_CHUNK_ROWS)
+    kept_df = None
+    duplicate_list = []
+    n_duplicate = 0
+    n_read = 0
+    for reg_chunk in reg_chunks:
+        if len(reg_chunk) == 0:
+            continue
+        reg_chunk = reg_chunk.assign(_key=_registration_keys(reg_chunk), \
+                                     _stamp=_parse_timestamps(reg_chunk.index).to_numpy(), \
+                                     _row=np.arange(n_read, n_read + len(reg_chunk)))
+        n_read += len(reg_chunk)
+        if kept_df is not None:
+            reg_chunk = pd.concat([kept_df, reg_chunk])
+        # The latest submission of each registration is the last one in this order
+        reg_chunk = reg_chunk.sort_values(['_stamp', '_row'], na_position='first', \
+                                          kind='stable')
+        cond_duplicate = reg_chunk['_key'].duplicated(keep='last').to_numpy()
+        n_duplicate += int(cond_duplicate.sum())
+        if duplicates_out is not None:
+            duplicate_list.append(reg_chunk[cond_duplicate])
+        kept_df = reg_chunk[~cond_duplicate]
+
+    if kept_df is None:
+        kept_df = pd.DataFrame(columns=form_columns)
+    else:
+        kept_df = kept_df.sort_values('_row').drop(columns=['_key', '_stamp', '_row'])
+    if n_duplicate:
+        print('Google form has', n_duplicate, 'duplicate registrations, keeping the ' \
+              'latest of each')
+    if duplicates_out is not None:
+        duplicate_df = pd.concat(duplicate_list) if duplicate_list else kept_df.iloc[0:0]
+        duplicate_df = duplicate_df.sort_values('_row') if len(duplicate_df) else duplicate_df
+        duplicate_df.drop(columns=['_key', '_stamp', '_row'], errors='ignore') \
+                    .to_csv(duplicates_out, index_label='Timestamp')
+        print('Wrote', len(duplicate_df), 'duplicate registrations to', duplicates_out)
+
+    return apply_schema(kept_df)
 
 def merge_df(dict_in):
     merged_df = pd.concat(dict_in.values(), ignore_index=True, sort=False)
-    return merged_df
+    return apply_schema(merged_df)
+
+# The merge_regdf function matches each registration of the Google form to a
+# paper, by the email used to fill in the form and by the title typed in (see
+# registration_match.py), and returns one row per (paper, registration) pair,
+# plus one row per paper without a registration and one row per registration
+# without a paper. The confidence of the title match is kept in the
+# "Match_score" column, and how the registration was matched in the
+# "Match_method" column.
+def merge_regdf(paperdata_in, regdata_in, title_index=None):
+    regdata_in, reg_rows, reg_paper, reg_method = match_registrations( \
+        paperdata_in, regdata_in, title_index=title_index)
+    report_unmatched('Google form', \
+                     list(regdata_in['P_title'].iloc[reg_rows[reg_paper < 0]].drop_duplicates()))
+
+    return _join_matched_regdf(paperdata_in, regdata_in, reg_rows, reg_paper, reg_method)
+
+# The _join_matched_regdf function builds the rows of merge_regdf from the
+# (registration, paper) pairs of match_registrations. Missing values are
+# "N/A". When keep_unregistered is False, the papers without a registration
+# are left out.
+def _join_matched_regdf(paperdata_in, regdata_in, reg_rows, reg_paper, reg_method, \
+                        keep_unregistered=True):
+    paper_rows = reg_paper
+    if keep_unregistered:
+        unregistered = np.setdiff1d(np.arange(len(paperdata_in)), reg_paper)
+        paper_rows = np.concatenate([paper_rows, unregistered])
+        reg_rows = np.concatenate([reg_rows, np.full(len(unregistered), -1)])
+        reg_method = np.concatenate([reg_method, np.full(len(unregistered), None)])
+
+    # Row -1 of each side is an "N/A" row, used for the missing side of a pair
+    paper_side = paperdata_in.rename(columns={'Type': 'Type_x'}).reset_index(drop=True)
+    paper_side = pd.concat([paper_side.astype(object), pd.DataFrame( \
+        [[None] * len(paper_side.columns)], columns=paper_side.columns)], \
+        ignore_index=True).fillna('N/A')
+    reg_side = regdata_in.rename(columns={'Type': 'Type_y', 'P_title': 'Reg_title'}) \
+                         .reset_index(drop=True)
+    reg_side = pd.concat([reg_side.astype(object), pd.DataFrame( \
+        [[None] * len(reg_side.columns)], columns=reg_side.columns)], \
+        ignore_index=True).fillna('N/A')
+
+    merged_df = pd.concat([paper_side.iloc[paper_rows].reset_index(drop=True), \
+                           reg_side.iloc[reg_rows].reset_index(drop=True)], axis=1)
+    merged_df['P_title'] = merged_df['P_title'].where(paper_rows >= 0, merged_df['Reg_title'])
+    merged_df = merged_df.drop(columns='Reg_title')
+    merged_df['Match_method'] = pd.Series(reg_method, dtype=object).fillna('N/A').to_numpy()
+    # Order the rows by title, as a merge on the title would
+    merged_df['paper_row'] = np.where(paper_rows >= 0, paper_rows, len(paperdata_in))
+    merged_df['reg_row'] = reg_rows
+    merged_df = merged_df.sort_values(by=['P_title', 'paper_row', 'reg_row'], kind='stable') \
+                         .drop(columns=['paper_row', 'reg_row']).reset_index(drop=True)
 
-def merge_regdf(paperdata_in, regdata_in):
-    merged_df = pd.merge(paperdata_in, regdata_in, on='P_title', how='outer')
-    merged_df = merged_df.fillna('N/A')
     merged_df['R_status'] = np.where(merged_df['Author_r'] != 'N/A', 'registered', 'not-registered')
     merged_df['P_status'] = np.where(merged_df['Tag'] != 'N/A', 'included', 'excluded')
 
-    return merged_df
-
+    return apply_schema(merged_df)
+
+# The columns that identify a paper in the "<tag>_status" sheets. The rows of
+# a paper are aggregated into one row listing all the authors that registered
+# for it.
+TAGDF_KEYS = ['Type_x',
+              'P_title',
+              'Author',
+              'Email',
+              'Affiliation',
+              'Country',
+              'Tag',
+              'R_status',
+              'P_status']
+
+# The _aggregate_registrants function returns one row per paper of df_in,
+# sorted by TAGDF_KEYS, with the names in "Author_r" joined by ', ' in the
+# order they were first seen. The papers are numbered with a single groupby
+# over the key columns and the names are joined with one np.add.reduceat over
+# the rows sorted by paper, instead of calling a Python function per paper.
+def _aggregate_registrants(df_in):
+    if len(df_in) == 0:
+        return pd.DataFrame(columns=TAGDF_KEYS + ['Author_r'], dtype=object)
+
+    paper_key = df_in.groupby(TAGDF_KEYS, sort=True, observed=True).ngroup().to_numpy()
+    row_order = np.argsort(paper_key, kind='stable')
+    paper_key = paper_key[row_order]
+    registrants = df_in['Author_r'].to_numpy(dtype=object)[row_order]
+    # Each author is only listed once per paper
+    cond_first = ~pd.DataFrame({'key': paper_key, 'name': registrants}).duplicated().to_numpy()
+    row_order = row_order[cond_first]
+    paper_key = paper_key[cond_first]
+    registrants = registrants[cond_first]
+
+    cond_start = np.r_[True, paper_key[1:] != paper_key[:-1]]
+    cond_last = np.r_[cond_start[1:], True]
+    registrants = np.where(cond_last, registrants, registrants + ', ')
+    group_starts = np.flatnonzero(cond_start)
+
+    tag_df = df_in[TAGDF_KEYS].iloc[row_order[group_starts]].reset_index(drop=True)
+    tag_df['Author_r'] = np.add.reduceat(registrants, group_starts)
+
+    return tag_df
+
+# The create_tagdf function returns the dataframe listed in the "<tag>_status"
+# sheet of one track: one row per paper, with the names of all the authors that
+# registered for it. The "other" track lists the registrations that do not
+# match any paper.
+def create_tagdf(merged_df, tag_now):
+    if tag_now == 'other':
+        return merged_df[merged_df['Tag'] == 'N/A']
+
+    return _aggregate_registrants(merged_df[merged_df['Tag'] == tag_now])
+
+# The create_tagdf_bytag function returns the "<tag>_status" dataframe of every
+# track. The papers of all the tracks are aggregated together and then split
+# by "Tag" in a single pass, rather than filtering the merged dataframe once
+# per track.
 def create_tagdf_bytag(xml_dictin, merged_df):
     def _create_taglist(xml_dictin):
         tag_l = [tag_now for tag_now in xml_dictin.keys()]
@@ -183,134 +343,526 @@ def create_tagdf_bytag(xml_dictin, merged_df):
     tag_list = _create_taglist(xml_dictin)
     merged_df.drop(['Type_y'], axis=1, inplace=True)
 
+    cond_other = (merged_df['Tag'] == 'N/A').to_numpy()
+    all_tagdf = _aggregate_registrants(merged_df[~cond_other])
+    tag_groups = {tag_now: tag_df.reset_index(drop=True) \
+                  for tag_now, tag_df in all_tagdf.groupby('Tag', sort=False, observed=True)}
+
     dict_df = {}
-    for tag_now in tag_list[:-1]:
-        cond_tag = merged_df['Tag'] == tag_now
-        cond_df = merged_df[cond_tag]
-        cond_df = cond_df.groupby(['Type_x', \
-                                   'P_title', \
-                                   'Author', \
-                                   'Email', \
-                                   'Affiliation', \
-                                   'Country', \
-                                   'Tag', \
-                                   'R_status', \
-                                   'P_status'])['Author_r'].apply(lambda x: ', '.join(list(set(x)))).reset_index()
-        dict_df[tag_now] = cond_df
-        print(tag_now, 'has', len(cond_df), 'entries')
-    dict_df[tag_list[-1]] = merged_df[merged_df['Tag'] == 'N/A']
-    print('other has', len(dict_df[tag_list[-1]]), 'entries')
+    for tag_now in tag_list:
+        if tag_now == 'other':
+            dict_df[tag_now] = merged_df[cond_other]
+        else:
+            dict_df[tag_now] = tag_groups.get(tag_now, all_tagdf.iloc[0:0])
+        print(tag_now, 'has', len(dict_df[tag_now]), 'entries')
 
     return dict_df
 
-def create_reg_summary(dict_in):
-    full_df = merge_df(dict_in)
-    temp_piv = pd.pivot_table(full_df, \
-                              values='P_title', \
-                              columns=['Tag'], \
-                              index=['R_status'], \
-                              aggfunc=len, \
-                              fill_value=0)
-
-    return pd.DataFrame(temp_piv)
-
-def write_to_excel(fulldf_in, typepivot_in, regpivot_in, dict_df, unreg_in, filetosave):
-
-    writer = pd.ExcelWriter(filetosave, \
-                            engine='xlsxwriter', \
-                            options={'strings_to_urls': False, \
-                                     'strings_to_numbers':True})
-
-    fulldf_in.to_excel(writer, sheet_name='FullList', index=False)
-    typepivot_in.to_excel(writer, sheet_name='Summary_by_Types')
-    regpivot_in.to_excel(writer, sheet_name='RegSummary_by_Tracks')
-    unreg_in.to_excel(writer, sheet_name='Unregistered_Papers')
-
-    for tag_now in dict_df:
-
-        sname = tag_now+'_status'
-        df_now = dict_df[tag_now]
-        df_now.to_excel(writer, sheet_name=sname, index=False)
-        workbook = writer.book
-        # Add a format. Light red fill with dark red text.
-        format1 = workbook.add_format({'bg_color': '#FFC7CE', \
-                                       'font_color': '#9C0006'})
-        # Add a format. Green fill with dark green text.
-        format2 = workbook.add_format({'bg_color': '#C6EFCE', \
-                                       'font_color': '#006100'})
-        worksheet = writer.sheets[sname]
-        r_status_idx = df_now.columns.get_loc('R_status')
-        p_status_idx = df_now.columns.get_loc('P_status')
-        # calculate cell_compute_start
-        rcell_compute_start = xl_rowcol_to_cell(1, r_status_idx)
-        pcell_compute_start = xl_rowcol_to_cell(1, p_status_idx)
-        #calculate cell_compute_end
-        rcell_compute_end = xl_rowcol_to_cell(len(df_now), r_status_idx)
-        pcell_compute_end = xl_rowcol_to_cell(len(df_now), p_status_idx)
-        worksheet.conditional_format(rcell_compute_start + ':' + rcell_compute_end, \
-                                    {'type': 'cell', \
-                                    'criteria': 'equal to', \
-                                    'value':'"not-registered"', \
-                                    'format': format1})
-        worksheet.conditional_format(rcell_compute_start + ':' + rcell_compute_end, \
-                                    {'type': 'cell', \
-                                    'criteria': 'equal to', \
-                                    'value':'"registered"', \
-                                    'format': format2})
-        worksheet.conditional_format(pcell_compute_start + ':' + pcell_compute_end, \
-                                    {'type': 'cell', \
-                                    'criteria': 'equal to', \
-                                    'value':'"excluded"', \
-                                    'format': format1})
-        worksheet.conditional_format(pcell_compute_start + ':' + pcell_compute_end, \
-                                    {'type': 'cell', \
-                                    'criteria': 'equal to', \
-                                    'value':'"included"', \
-                                    'format': format2})
-
-    writer.save()
-
-if __name__ == "__main__":
-
-    # Define the location of paper information from HotCRP
-    xml_dict = read_xml_text(sys.argv[1])
-
-    # Create a dictionary where each key stores a Pandas dataframe produced by
-    # reading in the respective .xml file
-    paper_dict = create_dictdf(xml_dict)
-
-    # Create a dataframe for the registration information
-    reg_df = create_googledf(sys.argv[2])
-
+# The count tables written to the .xlsx file, as SummaryTable records (see
+# summary_tables.py). They are all counted in one pass over the rows listed in
+# the "<tag>_status" sheets, where the "paper" rows are those of the tracks
+# (one per paper) and the "listed" rows also include the registrations of the
+# "other" track. A summary is added by adding a record here and a sheet in
+# write_to_excel.
+REGSTATUS_SUMMARIES = {'piv_tagtypedf': SummaryTable('Tag', 'Type_x', 'paper'),
+                       'paperreg_summarydf': SummaryTable('R_status', 'Tag'),
+                       'paperreg_countrydf': SummaryTable('Country', 'Tag', 'paper')}
+
+# The summarize_regstatus function returns the count tables of
+# REGSTATUS_SUMMARIES:
+# - piv_tagtypedf: the number of papers of each type at each track,
+# - paperreg_summarydf: the number of registered and not registered papers at
+# each track,
+# - paperreg_countrydf: the number of papers with an author from each country
+# at each track,
+# and the papers that have not yet registered, regardless of tracks
+# (paperreg_unregdf). The tables are counted from the "<tag>_status"
+# dataframes of dict_df_in, which already hold one row per paper.
+def summarize_regstatus(dict_df_in, paperreg_in):
+    summary_columns = ['Tag', 'Type_x', 'R_status', 'Country']
+    listed_df = pd.concat([df_now[summary_columns] for df_now in dict_df_in.values()], \
+                          ignore_index=True)
+    cond_paper = np.repeat([tag_now != 'other' for tag_now in dict_df_in], \
+                           [len(df_now) for df_now in dict_df_in.values()])
+    summaries = count_tables(listed_df, REGSTATUS_SUMMARIES, masks={'paper': cond_paper}, \
+                             multi_valued=['Country'])
+    summaries['piv_tagtypedf'] = summaries['piv_tagtypedf'].rename_axis(columns='Type')
+    summaries['paperreg_unregdf'] = paperreg_in[paperreg_in['R_status'] == 'not-registered']
+
+    return summaries
+
+# The build_regstatus function runs the full pipeline on the paper dataframes
+# of every track and the registration dataframe, and returns a dictionary
+# holding every dataframe written to the .xlsx file. This dictionary is also
+# the state kept between runs in incremental mode (see update_regstatus). Each
+# stage is measured when a profile is given (see stage_profiler.py).
+def build_regstatus(xml_dict, paper_dict, reg_df, profile_in=None):
     # Merge the dataframes produced by the HotCRP xml files
-    papermerged_df = merge_df(paper_dict)
-
-    # -----------------
-    # Some analyses
-    # -----------------
-    # Here we do some basic analyses to understand the distribution of paper types
-    # for the different tracks at the conference
-    piv_tagtype = pd.pivot_table(papermerged_df, \
-                                index=['Tag'], \
-                                columns="Type", \
-                                values="P_title", \
-                                aggfunc=len, fill_value=0)
-    piv_tagtypedf = pd.DataFrame(piv_tagtype)
+    with profile_stage(profile_in, 'merge_tracks'):
+        papermerged_df = merge_df(paper_dict)
+        title_index = build_title_index(papermerged_df['P_title'].drop_duplicates())
 
+    return merge_registrations(xml_dict, papermerged_df, title_index, reg_df, profile_in)
+
+# The merge_registrations function runs the stages of build_regstatus that
+# follow the merge of the tracks, so that in watch mode a changed Google form
+# is merged again with the papers already merged.
+def merge_registrations(xml_dict, papermerged_df, title_index, reg_df, profile_in=None):
     # Here we do some analyses to find out who has registered. We first merge the
     # dataframe containing the registration information with the dataframe containing
     # the paper information
-    paperreg_df = merge_regdf(papermerged_df, reg_df)
+    with profile_stage(profile_in, 'merge_registrations'):
+        paperreg_df = merge_regdf(papermerged_df, reg_df, title_index=title_index)
     # Then we create new dataframes based on the tracks, e.g. main
-    paperreg_df_by_type = create_tagdf_bytag(xml_dict, paperreg_df)
-    # Once we have created these dataframes, we compute a summary of the registration
-    # status of papers at the different tracks
-    paperreg_summarydf = create_reg_summary(paperreg_df_by_type)
-    # We also want to create a dataframe containing the papers that have not yet
-    # registered, regardless of tracks
-    cond_unreg = paperreg_df['R_status'] == 'not-registered'
-    paperreg_unregdf = paperreg_df[cond_unreg]
+    with profile_stage(profile_in, 'groupby_tracks'):
+        paperreg_df_by_type = create_tagdf_bytag(xml_dict, paperreg_df)
+    # Once we have created these dataframes, we do some analyses to understand the
+    # distribution of paper types and the registration status of papers at the
+    # different tracks, and list the papers that have not yet registered
+    with profile_stage(profile_in, 'summaries'):
+        summaries = summarize_regstatus(paperreg_df_by_type, paperreg_df)
+    record_frames(profile_in, {'reg_df': reg_df,
+                               'papermerged_df': papermerged_df,
+                               'paperreg_df': paperreg_df})
+
+    return dict({'papermerged_df': papermerged_df,
+                 'title_index': title_index,
+                 'paperreg_df': paperreg_df,
+                 'paperreg_df_by_type': paperreg_df_by_type}, **summaries)
+
+# ---------------------------------------------------------------------------
+# Incremental mode
+# ---------------------------------------------------------------------------
+# Registrations arrive a few at a time, so in incremental mode the dataframes
+# produced by build_regstatus are saved to a state file together with a
+# watermark: the latest Google form "Timestamp" that has been processed. On the
+# next run, only the form rows submitted after the watermark are merged, and
+# only the track sheets of the tracks those rows belong to are recomputed. The
+# whole form is still read, as Google forms only exports the full .csv file,
+# and the summaries are still counted for all the tracks. The state is rebuilt
+# from scratch whenever the list of .xml files or any of the .xml files
+# changes.
+#
+# The .xlsx file itself is still rewritten in full on every run, as a .xlsx
+# file cannot be updated in place.
+
+# Bump this whenever the content of the state file changes.
+STATE_VERSION = 3
+
+# The papers_signature function identifies the paper data of a run: the tracks
+# listed in the .txt file and the content of each .xml file.
+def papers_signature(xml_dict):
+    return tuple((tag_now, file_digest(xml_dict[tag_now])) for tag_now in xml_dict)
+
+def load_state(state_in):
+    try:
+        with open(state_in, 'rb') as f_in:
+            state = pickle.load(f_in)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        return None
+    if state.get('version') != STATE_VERSION:
+        return None
+
+    return state
+
+# The save_state function writes the state to a temporary file of its own next
+# to state_out first, so that an interrupted or concurrent run never leaves a
+# partly written state file behind.
+def save_state(state_out, state_in):
+    state_in['version'] = STATE_VERSION
+    fd_tmp, tmp_out = tempfile.mkstemp(suffix='.tmp', \
+                                       dir=os.path.dirname(os.path.abspath(state_out)))
+    try:
+        with os.fdopen(fd_tmp, 'wb') as f_out:
+            pickle.dump(state_in, f_out, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_out, state_out)
+    except BaseException:
+        os.remove(tmp_out)
+        raise
+
+# The formats of the Google form "Timestamp" column, tried in this order
+# before guessing the format of each remaining value, which is much slower.
+TIMESTAMP_FORMATS = ['%d/%m/%y %H:%M', '%d/%m/%Y %H:%M:%S']
+
+# pandas 2.0 and later need format="mixed" to guess the format of each value,
+# while older versions always do and would read "mixed" as a format.
+MIXED_FORMAT = {'format': 'mixed'} if int(pd.__version__.split('.')[0]) >= 2 else {}
+
+# The _parse_timestamps function converts the "Timestamp" index of the
+# registration dataframe (e.g. "29/5/20 13:52") into datetimes.
+def _parse_timestamps(index_in):
+    index_text = pd.Series(index_in, dtype=object).astype(str)
+    stamps = pd.Series(pd.NaT, index=index_text.index, dtype='datetime64[ns]')
+    for format_now in TIMESTAMP_FORMATS:
+        cond_left = stamps.isna()
+        if not cond_left.any():
+            break
+        stamps[cond_left] = pd.to_datetime(index_text[cond_left], format=format_now, \
+                                           errors='coerce')
+    cond_left = stamps.isna()
+    if cond_left.any():
+        stamps[cond_left] = pd.to_datetime(index_text[cond_left], dayfirst=True, \
+                                           errors='coerce', **MIXED_FORMAT)
+
+    return pd.Series(stamps.to_numpy(), index=index_in)
+
+def _row_hashes(reg_df):
+    return pd.util.hash_pandas_object(reg_df.reset_index().astype(str), \
+                                      index=False).to_numpy()
+
+# Google forms adds the rows in the order they are submitted, and its
+# timestamps only have a resolution of one minute, so only the rows submitted
+# in the last minute up to the watermark can be mistaken for rows that were
+# already processed.
+WATERMARK_WINDOW = pd.Timedelta(minutes=1)
+
+# The _near_watermark function returns the rows whose timestamp is within
+# WATERMARK_WINDOW of the watermark or is missing (all the rows when there is
+# no watermark).
+def _near_watermark(stamps_in, watermark_in):
+    if watermark_in is None:
+        return np.ones(len(stamps_in), dtype=bool)
+
+    return np.array(stamps_in.isna() | (stamps_in >= watermark_in - WATERMARK_WINDOW), \
+                    dtype=bool)
+
+# The set_watermark function records in the state the latest "Timestamp" of
+# reg_df, and the hashes of the rows of reg_df near the watermark, which are
+# the only rows that are compared on the next run.
+def set_watermark(state_in, reg_df):
+    stamps = _parse_timestamps(reg_df.index)
+    watermark = stamps.max()
+    state_in['watermark'] = None if pd.isna(watermark) else watermark
+    cond_near = _near_watermark(stamps, state_in['watermark'])
+    state_in['seen_rows'] = np.unique(_row_hashes(reg_df[cond_near]))
+
+    return state_in
+
+# The select_new_registrations function returns the rows of reg_df that have
+# not been processed yet. Rows submitted after the watermark are new, and rows
+# submitted more than WATERMARK_WINDOW before it were processed by the previous
+# run. The rows in between (or without a valid timestamp) are compared with the
+# hashes of the rows processed by the previous run, so the cost of a run
+# follows the number of new registrations rather than the size of the form.
+def select_new_registrations(state_in, reg_df):
+    stamps = _parse_timestamps(reg_df.index)
+    watermark = state_in.get('watermark')
+    if watermark is None:
+        cond_new = np.zeros(len(reg_df), dtype=bool)
+    else:
+        cond_new = np.array(stamps > watermark, dtype=bool)
+    cond_check = ~cond_new & _near_watermark(stamps, watermark)
+    if cond_check.any():
+        row_hashes = _row_hashes(reg_df[cond_check])
+        cond_new[cond_check] = ~np.isin(row_hashes, state_in['seen_rows'])
+
+    return reg_df[cond_new]
+
+# The update_regstatus function merges the new registrations newreg_in into the
+# state produced by build_regstatus, and recomputes only the track sheets of
+# the tracks that those registrations belong to. The summaries are always
+# counted again in full, for all the tracks, in one pass over the track sheets
+# (see summarize_regstatus).
+def update_regstatus(state_in, newreg_in):
+    if len(newreg_in) == 0:
+        print('No new registrations')
+        return state_in
+
+    papermerged_df = state_in['papermerged_df']
+    regdata_in, reg_rows, reg_paper, reg_method = match_registrations( \
+        papermerged_df, newreg_in, title_index=state_in['title_index'])
+    report_unmatched('Google form', \
+                     list(regdata_in['P_title'].iloc[reg_rows[reg_paper < 0]].drop_duplicates()))
+    new_df = _join_matched_regdf(papermerged_df, regdata_in, reg_rows, reg_paper, reg_method, \
+                                 keep_unregistered=False)
+    new_df.drop(['Type_y'], axis=1, inplace=True)
+
+    # The new rows replace the "not-registered" rows of the papers they match.
+    paperreg_df = state_in['paperreg_df']
+    matched_papers = new_df.loc[new_df['P_status'] == 'included', ['P_title', 'Tag']]
+    cond_keep = ~(pd.MultiIndex.from_frame(paperreg_df[['P_title', 'Tag']]) \
+                  .isin(pd.MultiIndex.from_frame(matched_papers)) & \
+                  (paperreg_df['Author_r'] == 'N/A').to_numpy())
+    # A new submission of a registration replaces its earlier submission (see
+    # create_googledf).
+    cond_superseded = np.isin(_registration_keys(paperreg_df), _registration_keys(newreg_in)) & \
+                      (paperreg_df['Author_r'] != 'N/A').to_numpy()
+    cond_keep &= ~cond_superseded
+    superseded_tags = paperreg_df.loc[cond_superseded, 'Tag'].unique()
+    paperreg_df = apply_schema(pd.concat([paperreg_df[cond_keep], new_df], \
+                                         ignore_index=True, sort=False))
+    paperreg_df = paperreg_df.sort_values(by='P_title', kind='stable').reset_index(drop=True)
+
+    tags_changed = ['other' if tag_now == 'N/A' else tag_now \
+                    for tag_now in pd.unique(np.concatenate([new_df['Tag'].unique(), \
+                                                             superseded_tags]))]
+    dict_df = state_in['paperreg_df_by_type']
+    for tag_now in tags_changed:
+        dict_df[tag_now] = create_tagdf(paperreg_df, tag_now)
+        print(tag_now, 'has', len(dict_df[tag_now]), 'entries')
+    print(len(newreg_in), 'new registrations, updated', ', '.join(tags_changed))
+
+    state_in['paperreg_df'] = paperreg_df
+    state_in.update(summarize_regstatus(dict_df, paperreg_df))
+
+    return state_in
+
+# The _write_status_sheet function writes the "<tag>_status" sheet of one
+# track, with the "R_status" and "P_status" columns highlighted in red or
+# green.
+def _write_status_sheet(workbook, formats, tag_now, df_now):
+    worksheet = write_df(workbook, tag_now + '_status', df_now, \
+                         header_format=formats['header'])
+    highlight_values(worksheet, df_now.columns.get_loc('R_status'), \
+                     len(df_now), [('"not-registered"', formats['bad']), \
+                                   ('"registered"', formats['good'])])
+    highlight_values(worksheet, df_now.columns.get_loc('P_status'), \
+                     len(df_now), [('"excluded"', formats['bad']), \
+                                   ('"included"', formats['good'])])
+
+# The write_to_excel function writes the summary sheets and one "<tag>_status"
+# sheet per track to the .xlsx file. The "Summary_by_Countries" sheet is only
+# written when countrypivot_in is given.
+def write_to_excel(fulldf_in, typepivot_in, regpivot_in, dict_df, unreg_in, filetosave, \
+                   countrypivot_in=None):
+
+    workbook = create_workbook(filetosave)
+    formats = create_status_formats(workbook)
+
+    write_df(workbook, 'FullList', fulldf_in, header_format=formats['header'])
+    write_df(workbook, 'Summary_by_Types', typepivot_in, index=True, \
+             header_format=formats['header'])
+    write_df(workbook, 'RegSummary_by_Tracks', regpivot_in, index=True, \
+             header_format=formats['header'])
+    write_df(workbook, 'Unregistered_Papers', unreg_in, index=True, \
+             header_format=formats['header'])
+    if countrypivot_in is not None:
+        write_df(workbook, 'Summary_by_Countries', countrypivot_in, index=True, \
+                 header_format=formats['header'])
+
+    for tag_now in dict_df:
+        _write_status_sheet(workbook, formats, tag_now, dict_df[tag_now])
+
+    workbook.close()
+
+# The write_track_workbook function writes the .xlsx file of one track: its
+# "<tag>_status" sheet and its rows of the summary and unregistered papers
+# sheets. The "other" track is listed as "N/A" in the summaries. The
+# "Summary_by_Countries" sheet is only written when countrypivot_in is given.
+def write_track_workbook(tag_now, tagdf_in, typepivot_in, regpivot_in, unreg_in, filetosave, \
+                         countrypivot_in=None):
+    tag_key = 'N/A' if tag_now == 'other' else tag_now
+    workbook = create_workbook(filetosave)
+    formats = create_status_formats(workbook)
+
+    _write_status_sheet(workbook, formats, tag_now, tagdf_in)
+    write_df(workbook, 'Summary_by_Types', typepivot_in[typepivot_in.index == tag_key], \
+             index=True, header_format=formats['header'])
+    write_df(workbook, 'RegSummary_by_Tracks', regpivot_in[[tag_key]] \
+             if tag_key in regpivot_in.columns else regpivot_in[[]], \
+             index=True, header_format=formats['header'])
+    write_df(workbook, 'Unregistered_Papers', unreg_in[unreg_in['Tag'] == tag_key], \
+             index=True, header_format=formats['header'])
+    if countrypivot_in is not None:
+        if tag_key in countrypivot_in.columns:
+            countrypivot_in = countrypivot_in.loc[countrypivot_in[tag_key] > 0, [tag_key]]
+        else:
+            countrypivot_in = countrypivot_in[[]].iloc[:0]
+        write_df(workbook, 'Summary_by_Countries', countrypivot_in, index=True, \
+                 header_format=formats['header'])
+
+    workbook.close()
+
+# The write_split_by_track function writes one .xlsx file per track, named
+# "<index file name>-<tag>.xlsx" and placed next to index_out, in up to jobs
+# worker processes. index_out is a small .xlsx file listing the tracks, their
+# registration counts and a link to the file of each track.
+def write_split_by_track(regstatus_in, index_out, jobs=1):
+    dict_df = regstatus_in['paperreg_df_by_type']
+    regpivot = regstatus_in['paperreg_summarydf']
+    out_stem = os.path.splitext(index_out)[0]
+    track_files = {tag_now: out_stem + '-' + tag_now + '.xlsx' for tag_now in dict_df}
+    track_args = {tag_now: (tag_now, dict_df[tag_now], regstatus_in['piv_tagtypedf'], \
+                            regpivot, regstatus_in['paperreg_unregdf'], \
+                            track_files[tag_now], regstatus_in.get('paperreg_countrydf')) \
+                  for tag_now in dict_df}
+    _, errors = run_parallel(write_track_workbook, track_args, jobs)
+    if errors:
+        raise next(iter(errors.values()))
+
+    def _count(tag_now, status_in):
+        tag_key = 'N/A' if tag_now == 'other' else tag_now
+        if tag_key not in regpivot.columns or status_in not in regpivot.index:
+            return 0
+        return int(regpivot.loc[status_in, tag_key])
+
+    index_df = pd.DataFrame({'Track': list(dict_df),
+                             'Rows': [len(dict_df[tag_now]) for tag_now in dict_df],
+                             'Registered': [_count(tag_now, 'registered') for tag_now in dict_df],
+                             'Not_registered': [_count(tag_now, 'not-registered') \
+                                                for tag_now in dict_df],
+                             'File': [os.path.basename(track_files[tag_now]) \
+                                      for tag_now in dict_df]})
+    workbook = create_workbook(index_out)
+    formats = create_status_formats(workbook)
+    write_df(workbook, 'Index', index_df, header_format=formats['header'], \
+             links={'File': ['external:' + file_now for file_now in index_df['File']]})
+    workbook.close()
+    print('Wrote', len(track_files), 'track files listed in', index_out)
+
+# The refresh_regstatus function runs the pipeline and writes the .xlsx file.
+# The parsed inputs and merged dataframes are kept in state_in, so that in watch
+# mode only the stages downstream of the files listed in changed are run again
+# (everything when changed is None):
+# - a changed .xml file only re-reads that track,
+# - a changed .txt file only re-reads the tracks that were added or moved,
+# - a changed Google form is merged again with the papers already merged or,
+# with --incremental, only the rows submitted since the previous run are merged.
+# Each stage is measured when a profile is given (see stage_profiler.py).
+def refresh_regstatus(args, state_in, changed=None, profile_in=None):
+    if changed is None:
+        # Define the location of paper information from HotCRP
+        xml_dict = read_xml_text(args.xml_list)
+        stale_tags = list(xml_dict)
+    else:
+        xml_dict = state_in['xml_dict']
+        if args.xml_list in changed:
+            xml_dict = read_xml_text(args.xml_list)
+        stale_tags = [tag_now for tag_now in xml_dict \
+                      if state_in['xml_dict'].get(tag_now) != xml_dict[tag_now] \
+                      or xml_dict[tag_now] in changed]
+    papers_changed = bool(stale_tags) or list(xml_dict) != list(state_in.get('xml_dict', {}))
+
+    if changed is None or args.form_csv in changed:
+        # Create a dataframe for the registration information
+        with profile_stage(profile_in, 'form_csv_load'):
+            state_in['reg_df'] = create_googledf(args.form_csv, \
+                                                 duplicates_out=args.duplicates)
+    reg_df = state_in['reg_df']
+
+    regstatus = state_in.get('regstatus')
+    if changed is None and args.incremental:
+        regstatus = load_state(args.incremental)
+        if regstatus is not None and \
+           regstatus.get('papers_signature') == papers_signature(xml_dict):
+            papers_changed = False
+        elif regstatus is not None:
+            print('Paper data changed, rebuilding', args.incremental)
+
+    if not papers_changed and args.incremental:
+        # Only merge the registrations submitted since the previous run
+        with profile_stage(profile_in, 'incremental_update'):
+            regstatus = update_regstatus(regstatus, \
+                                         select_new_registrations(regstatus, reg_df))
+    elif not papers_changed:
+        # Merge the whole form again, so that deleted and edited rows are
+        # taken into account, but keep the merged papers
+        regstatus = merge_registrations(xml_dict, regstatus['papermerged_df'], \
+                                        regstatus['title_index'], reg_df, profile_in)
+    else:
+        # Create a dictionary where each key stores a Pandas dataframe produced by
+        # reading in the respective .xml file. Only the tracks that changed are
+        # read again.
+        # The tracks that were never read (e.g. when a previous run was
+        # restored from the --incremental state) are read as well.
+        paper_dict = state_in.get('paper_dict', {})
+        stale_tags = [tag_now for tag_now in xml_dict \
+                      if tag_now in stale_tags or tag_now not in paper_dict]
+        with profile_stage(profile_in, 'xml_parse'):
+            paper_dict.update(create_dictdf({tag_now: xml_dict[tag_now] for tag_now in stale_tags}, \
+                                            use_cache=not args.no_cache, jobs=args.jobs))
+        paper_dict = {tag_now: paper_dict[tag_now] for tag_now in xml_dict}
+        state_in['paper_dict'] = paper_dict
+        regstatus = build_regstatus(xml_dict, paper_dict, reg_df, profile_in)
+    state_in['regstatus'] = set_watermark(regstatus, reg_df)
+    # Only kept once the build succeeded, so that a failed refresh is retried
+    # for the same tracks on the next change
+    state_in['xml_dict'] = xml_dict
+
+    if args.incremental:
+        regstatus['papers_signature'] = papers_signature(xml_dict)
+        save_state(args.incremental, regstatus)
 
     # Finally we write our results to an Excel file
-    write_to_excel(papermerged_df, piv_tagtypedf, paperreg_summarydf, \
-                   paperreg_df_by_type, paperreg_unregdf, sys.argv[3])
+    with profile_stage(profile_in, 'xlsx_write'):
+        if args.split_by_track:
+            write_split_by_track(regstatus, args.output_xlsx, jobs=args.jobs)
+        else:
+            write_to_excel(regstatus['papermerged_df'], regstatus['piv_tagtypedf'], \
+                           regstatus['paperreg_summarydf'], \
+                           regstatus['paperreg_df_by_type'], \
+                           regstatus['paperreg_unregdf'], args.output_xlsx, \
+                           regstatus['paperreg_countrydf'])
+
+    # Write the merged tables to the other formats requested. The authors are
+    # listed from the paper store of each track, which keeps each author as
+    # listed on the paper, and only the tracks that changed are read again
+    if args.export:
+        state_in['paper_stores'] = update_stores(state_in.get('paper_stores', {}), \
+                                                 xml_dict, stale_tags)
+    for format_now, path_now in args.export or []:
+        with profile_stage(profile_in, 'export_' + format_now):
+            write_tables({'papers': regstatus['papermerged_df'],
+                          'authors': author_table(state_in['paper_stores'].values(), \
+                                                  regstatus['papermerged_df'], \
+                                                  ['P_title', 'Tag']),
+                          'registrations': regstatus['paperreg_df']}, \
+                         format_now, path_now)
+
+    return state_in
+
+# The main function runs the script (see acm_assist.py).
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(description='Create the registration ' \
+                                     'status .xlsx file from the HotCRP and ' \
+                                     'Google Form data.', prog=prog)
+    parser.add_argument('xml_list', help='.txt file listing the .xml files ' \
+                        'produced by HotCRP')
+    parser.add_argument('form_csv', help='.csv file produced by Google forms')
+    parser.add_argument('output_xlsx', help='resulting .xlsx file')
+    parser.add_argument('--no-cache', action='store_true', \
+                        help='do not reuse or store cached parsed inputs')
+    parser.add_argument('--jobs', type=int, default=1, metavar='N', \
+                        help='number of tracks to read (and, with ' \
+                        '--split-by-track, write) in parallel')
+    parser.add_argument('--split-by-track', action='store_true', \
+                        help='write one .xlsx file per track, and an index ' \
+                        'of them to the output .xlsx file')
+    parser.add_argument('--incremental', metavar='STATE_FILE', \
+                        help='keep the merged data in STATE_FILE and only ' \
+                        'process the Google form rows added since the last run')
+    parser.add_argument('--watch', action='store_true', \
+                        help='keep running and regenerate the .xlsx file ' \
+                        'whenever one of the input files changes')
+    parser.add_argument('--export', action='append', type=parse_export, \
+                        metavar='FORMAT=PATH', help='also write the tables ' \
+                        'to PATH as "sqlite", "parquet" or "xlsx" (can be ' \
+                        'given several times)')
+    parser.add_argument('--duplicates', metavar='DUPLICATES_CSV', \
+                        help='write the Google form rows dropped as duplicates ' \
+                        'to this .csv file')
+    parser.add_argument('--profile', metavar='REPORT_JSON', \
+                        help='write the time used by each stage to this ' \
+                        '.json file')
+    parser.add_argument('--profile-memory', action='store_true', \
+                        help='with --profile, also trace the peak memory of ' \
+                        'each stage (this slows the run down, so the times ' \
+                        'measured are higher than without it)')
+    args = parser.parse_args(argv)
+    if args.profile_memory and not args.profile:
+        parser.error('--profile-memory requires --profile')
+
+    profile = new_profile('publication_registration_status.py', args.profile_memory) \
+        if args.profile else None
+    regstatus_state = refresh_regstatus(args, {}, profile_in=profile)
+    if profile is not None:
+        write_report(profile, args.profile)
+        print_summary(profile)
+
+    if args.watch:
+        watch_files(lambda: [args.xml_list, args.form_csv] + \
+                    list(regstatus_state['xml_dict'].values()), \
+                    lambda changed: refresh_regstatus(args, regstatus_state, changed))
+
+if __name__ == "__main__":
+    main()
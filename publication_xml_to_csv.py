@@ -1,6 +1,11 @@
-import xml.etree.ElementTree as ET
+import argparse
 import csv
-import sys
+import os
+import shutil
+import tempfile
+from hotcrp_reader import iter_papers, read_xml_text
+from parallel_tasks import run_parallel
+from stage_profiler import new_profile, profile_stage, write_report, print_summary
 
 """
 Description: this function converts the XML file available on the HotCRP website
@@ -17,18 +22,49 @@ in https://www.acm.org/publications/gi-proceedings), i.e.
 "Lead Author:Affiliation;Author2:Affiliation;Author3:Affiliation;etc.",
 "Lead Author e-mail",”Author e-mail;Author e-mail"
 
-Once the .csv file has been generated, save the .csv file with "UTF-8 encoding
-with BOM" using Sublime Text to ensure that the special characters are encoded
-correctly.
+The papers are read from the .xml file and written to the .csv file one at a
+time, so memory use does not grow with the size of the .xml file. The .csv
+file is written as "UTF-8 with BOM" by default, so that the special characters
+are displayed correctly without re-saving the file in another editor; use
+--encoding to choose another encoding.
+
+With --manifest, the first argument is instead the .txt file listing the .xml
+file of each track (the same "<tag> <path-to-.xml-file>" lines as for
+publication_registration_status.py), and all the tracks are converted in one
+run, in up to --jobs worker processes:
+- by default, the second argument is a directory, and one .csv file is written
+per track, named after its tag, e.g. "main.csv" and "poster.csv",
+- with --merged, the second argument is a single .csv file holding the papers
+of all the tracks, in the order of the .txt file.
+A track that cannot be converted (e.g. a missing or malformed .xml file) is
+reported and does not stop the other tracks; the script then exits with
+status 1. With --merged, the merged .csv file holds the tracks that were
+converted.
+
+With --profile <path-to-.json-file>, the time used by the conversion is
+written to a .json report (see stage_profiler.py), along with the peak memory
+with --profile-memory, which slows the conversion down. As the
+papers are parsed and written one at a time, both are measured as a single
+"xml_parse_csv_write" stage (followed by a "merge_csv" stage with --merged).
 
 Syntax: python publication_xml_to_csv.py <path-to-xmlfile> <output-filename>
+        [--encoding <encoding>] [--profile <path-to-.json-file>]
+        [--profile-memory]
+        python publication_xml_to_csv.py --manifest
+        <path-to-.txt-file-listing-the-.xml-files> <output-directory>
+        [--merged] [--jobs N] [--encoding <encoding>]
+        [--profile <path-to-.json-file>] [--profile-memory]
 Example syntax: python publication_xml_to_csv.py data/sample-main-acmcms-toc.xml
                 exported-data/sample-main-acmcms-toc.csv
+                python publication_xml_to_csv.py --manifest
+                data/sample-xml_list.txt exported-data/sample-all-tracks.csv
+                --merged --jobs 2
 """
 
-# The convert_xmldata function takes the xml data that has been parsed,
-# processes the data and converts it into the format that is required by ACM
-# (see above description for format).
+# The convert_xmldata function takes the path to the xml file, reads the papers
+# one at a time, processes the data and converts it into the format that is
+# required by ACM (see above description for format). The rows are yielded as
+# soon as each paper has been read.
 def convert_xmldata(xml_in):
 
     def _flatten_list(list_in):
@@ -37,54 +73,151 @@ def convert_xmldata(xml_in):
         return flattened_string
 
     def _separate_emails(list_in):
-        l_email = list_in[0]
+        l_email = list_in[0] if list_in else ''
         o_email = ';'.join(list_in[1:])
 
         return l_email, o_email
 
-    paper_list = []
-    for member in xml_in.findall('paper'):
-        paper_type = member.find('paper_type').text
-        paper_title = member.find('paper_title').text
-        for author_in in member.findall('authors'):
-            author_names = []
-            author_emails = []
-            for a_author in author_in.findall('author'):
-                a_count = 0
-                f_name = a_author.find('first_name').text
-                m_name = a_author.find('middle_name').text
-                l_name = a_author.find('last_name').text
-                if m_name is None:
-                    a_name = f_name + " " + l_name
-                else:
-                    a_name = f_name + " " + m_name + " " + l_name
-                a_affiliation = a_author.find('affiliation').text
-                a_name_aff = a_name + ":" + a_affiliation
-                author_names.append(a_name_aff)
-                a_email = a_author.find('email_address').text
-                author_emails.append(a_email)
-                a_count += 1
+    for paper in iter_papers(xml_in):
+        author_names = [a_author.name + ":" + a_author.affiliation
+                        for a_author in paper.authors]
+        author_emails = [a_author.email for a_author in paper.authors]
         paper_authors = _flatten_list(author_names)
         l_email, paper_emails = _separate_emails(author_emails)
-        paper_list.append([paper_type, paper_title, paper_authors, l_email, paper_emails])
+        yield [paper.paper_type, paper.paper_title, paper_authors, l_email, paper_emails]
 
-    return paper_list
-
-def write_to_csv(arraytowrite, filetosave):
-    with open(filetosave, 'wt', encoding='utf-8') as csvfile:
+# The write_to_csv function writes the rows to the .csv file as they are
+# produced. The default "utf-8-sig" encoding starts the file with a BOM.
+def write_to_csv(arraytowrite, filetosave, encoding='utf-8-sig'):
+    with open(filetosave, 'wt', encoding=encoding, newline='') as csvfile:
         paperwriter = csv.writer(csvfile, quoting=csv.QUOTE_ALL)
         for row_now in arraytowrite:
             paperwriter.writerow(row_now)
 
-if __name__ == "__main__":
-    # Define the xml data
-    tree = ET.parse(sys.argv[1])
+# The convert_track function converts the .xml file of one track into a .csv
+# file, either in this process or in a worker process, and names the track in
+# any error it raises.
+def convert_track(tag_in, xml_in, csv_out, encoding='utf-8-sig'):
+    try:
+        write_to_csv(arraytowrite=convert_xmldata(xml_in), filetosave=csv_out, \
+                     encoding=encoding)
+    except Exception as err:
+        # Do not leave a partly written .csv file behind
+        if os.path.exists(csv_out):
+            os.remove(csv_out)
+        raise RuntimeError('Could not convert track {} ({}): {}: {}'.format( \
+            tag_in, xml_in, type(err).__name__, err)) from err
+
+    return csv_out
+
+# The convert_tracks function converts the .xml file of every track of
+# xml_dict into the .csv file of the track in csv_dict, in up to jobs worker
+# processes, and returns a dictionary of {tag: .csv file written} for the
+# tracks that succeeded and {tag: error} for those that failed, both in the
+# order of xml_dict.
+def convert_tracks(xml_dict, csv_dict, encoding='utf-8-sig', jobs=1):
+    written, errors = run_parallel(convert_track, \
+                                   {tag_now: (tag_now, xml_dict[tag_now], \
+                                              csv_dict[tag_now], encoding) \
+                                    for tag_now in xml_dict}, jobs)
+    failed = {tag_now: str(err) for tag_now, err in errors.items()}
+    for error_now in failed.values():
+        print(error_now)
+
+    return written, failed
 
-    # Create the root object
-    xml_data = tree.getroot()
+# The merge_csv function concatenates the .csv files of csv_list, written in
+# UTF-8 without BOM, into the single file csv_out, in the order of csv_list.
+def merge_csv(csv_list, csv_out, encoding='utf-8-sig'):
+    with open(csv_out, 'wt', encoding=encoding, newline='') as merged_file:
+        for csv_now in csv_list:
+            with open(csv_now, 'rt', encoding='utf-8', newline='') as track_file:
+                shutil.copyfileobj(track_file, merged_file)
 
-    # Process the XML xml_data
-    conv_xmldata = convert_xmldata(xml_data)
+# The convert_manifest function converts the tracks listed in the .txt file
+# xml_list, into one .csv file per track in the directory out_path or, with
+# merged, into the single .csv file out_path. It returns the tracks that failed.
+def convert_manifest(xml_list, out_path, merged=False, encoding='utf-8-sig', jobs=1, \
+                     profile=None):
+    xml_dict = read_xml_text(xml_list)
+    if not merged:
+        os.makedirs(out_path, exist_ok=True)
+        csv_dict = {tag_now: os.path.join(out_path, tag_now + '.csv') for tag_now in xml_dict}
+        with profile_stage(profile, 'xml_parse_csv_write'):
+            written, failed = convert_tracks(xml_dict, csv_dict, encoding, jobs)
+        for tag_now in written:
+            print('Track', tag_now + ':', written[tag_now])
+        return failed
 
-    # Write the processed data to csv
-    write_to_csv(arraytowrite=conv_xmldata, filetosave=sys.argv[2])
+    # Each track is written to its own file next to out_path, then the files
+    # are concatenated in the order of the .txt file; the tracks are written
+    # in UTF-8 without BOM so that only the merged file starts with one.
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(out_path))) as tmp_dir:
+        csv_dict = {tag_now: os.path.join(tmp_dir, str(i_now) + '.csv') \
+                    for i_now, tag_now in enumerate(xml_dict)}
+        with profile_stage(profile, 'xml_parse_csv_write'):
+            written, failed = convert_tracks(xml_dict, csv_dict, 'utf-8', jobs)
+        with profile_stage(profile, 'merge_csv'):
+            merge_csv(list(written.values()), out_path, encoding)
+    print('Merged', len(written), 'track(s) into', out_path + ':', ', '.join(written))
+
+    return failed
+
+# The main function runs the script (see acm_assist.py).
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(description='Convert the HotCRP TOC ' \
+                                     '.xml file into the .csv format ' \
+                                     'required by ACM.', prog=prog)
+    parser.add_argument('xml_in', help='.xml file produced by HotCRP or, with ' \
+                        '--manifest, .txt file listing the .xml file of each track')
+    parser.add_argument('csv_out', help='resulting .csv file or, with --manifest, ' \
+                        'directory of the .csv file of each track')
+    parser.add_argument('--manifest', action='store_true', \
+                        help='convert all the tracks listed in the .txt file xml_in')
+    parser.add_argument('--merged', action='store_true', \
+                        help='with --manifest, write the papers of all the ' \
+                        'tracks to the single .csv file csv_out')
+    parser.add_argument('--jobs', type=int, default=1, metavar='N', \
+                        help='with --manifest, number of tracks to convert in ' \
+                        'parallel')
+    parser.add_argument('--encoding', default='utf-8-sig', \
+                        help='encoding of the .csv file (default: utf-8-sig, ' \
+                        'i.e. UTF-8 with BOM)')
+    parser.add_argument('--profile', metavar='REPORT_JSON', \
+                        help='write the time used by the conversion to ' \
+                        'this .json file')
+    parser.add_argument('--profile-memory', action='store_true', \
+                        help='with --profile, also trace the peak memory of ' \
+                        'each stage (this slows the run down, so the times ' \
+                        'measured are higher than without it)')
+    args = parser.parse_args(argv)
+    if args.merged and not args.manifest:
+        parser.error('--merged requires --manifest')
+    if args.profile_memory and not args.profile:
+        parser.error('--profile-memory requires --profile')
+
+    profile = new_profile('publication_xml_to_csv.py', args.profile_memory) \
+        if args.profile else None
+    failed = {}
+    if args.manifest:
+        failed = convert_manifest(args.xml_in, args.csv_out, merged=args.merged, \
+                                  encoding=args.encoding, jobs=args.jobs, profile=profile)
+    else:
+        with profile_stage(profile, 'xml_parse_csv_write'):
+            # Process the XML data, one paper at a time
+            conv_xmldata = convert_xmldata(args.xml_in)
+
+            # Write the processed data to csv as it is produced
+            write_to_csv(arraytowrite=conv_xmldata, filetosave=args.csv_out, \
+                         encoding=args.encoding)
+    if profile is not None:
+        write_report(profile, args.profile)
+        print_summary(profile)
+    if failed:
+        print(len(failed), 'track(s) failed:', ', '.join(failed))
+        return 1
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,323 @@
+import argparse
+import datetime
+import json
+import threading
+import time
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+import pandas as pd
+from paper_store import build_store, track_frames, find_authors, papers_for_author, \
+    paper_number, paper_authors
+from publication_registration_status import read_xml_text, create_googledf, \
+    build_regstatus
+from publication_checklist import create_acm_df
+from title_join import align_titles, match_title
+from watch_inputs import watch_files
+
+"""
+Description:
+This script answers questions about the papers and registrations of a
+conference from a small HTTP server running on this computer, e.g. during the
+conference at the registration desk:
+- is paper X registered?
+- which papers is this email address on?
+- which posters have not registered yet?
+instead of running publication_registration_status.py again and opening the
+.xlsx file for each question.
+
+The .xml files listed in the .txt file, the Google form .csv file and,
+optionally, the ACM .csv file are read once, into a paper store (see
+paper_store.py) and the registration status dataframes (see
+publication_registration_status.py), and indexed by paper, author email and
+name, and title. Each query is then answered from memory. The input files are
+watched (see watch_inputs.py), and the data is read again in the background
+whenever one of them changes; queries keep being answered from the previous
+data until the new data is ready.
+
+The server only listens on 127.0.0.1 and only uses the standard library on
+top of the packages used by the other scripts. The answers are JSON:
+- GET /status: when the data was loaded and how many papers and registrations
+it holds
+- GET /papers?tag=<tag>&id=<paper ID>: one paper and its registrations
+- GET /papers?title=<title>: the paper with this title (near matches are
+accepted, see title_join.py)
+- GET /papers?tag=<tag>&type=<paper type>&registered=<yes|no>: the papers of a
+track, of a type and/or with a registration status, e.g.
+/papers?type=Poster%20Paper&registered=no
+- GET /unregistered?tag=<tag>&type=<paper type>: the papers without a
+registration
+- GET /authors?email=<email>&name=<author name>: the authors and their papers
+- GET /summary: the registration status and paper types of each track
+
+Syntax: python query_server.py <path-to-.txt-file-listing-the-.xml-files>
+        <path-to-.csv-file-from-Google-forms> [--acm-csv <path>]
+        [--port N] [--no-watch]
+Example syntax: python query_server.py data/sample-xml_list.txt
+                data/sample-google-form.csv --port 8808
+Example query: curl 'http://127.0.0.1:8808/papers?tag=main&id=2'
+"""
+
+DEFAULT_PORT = 8808
+
+# The load_data function reads the input files and returns the indexed data
+# the queries are answered from.
+def load_data(xml_list, form_csv, acm_csv=None):
+    xml_dict = read_xml_text(xml_list)
+    paper_store = build_store(xml_dict)
+    paper_dict = track_frames(paper_store, xml_dict)
+    reg_df = create_googledf(form_csv)
+    regstatus = build_regstatus(xml_dict, paper_dict, reg_df)
+
+    # The registrations of each paper, keyed by (track, paper ID), so papers
+    # sharing a title keep their own registrations
+    paperreg_df = regstatus['paperreg_df']
+    registered = paperreg_df[(paperreg_df['P_status'] == 'included') & \
+                             (paperreg_df['R_status'] == 'registered')]
+    registrations = defaultdict(list)
+    for row_now in registered[['Tag', 'Id', 'Author_r', 'Username', \
+                               'Match_method']].itertuples(index=False):
+        registrations[(row_now.Tag, row_now.Id)].append( \
+            {'name': row_now.Author_r, 'email': row_now.Username, \
+             'matched_by': row_now.Match_method})
+    unmatched = paperreg_df.loc[paperreg_df['P_status'] == 'excluded', \
+                                ['P_title', 'Author_r', 'Username']]
+
+    # The papers keyed by (track, paper ID), and by paper ID alone for the
+    # queries without a track
+    papers_by_id = {}
+    papers_by_number = defaultdict(list)
+    papers_by_title = defaultdict(list)
+    for paper in paper_store['papers']:
+        id_now = paper_number(paper.event_tracking_number)
+        papers_by_id[(paper.tag, id_now)] = paper.paper_id
+        papers_by_number[id_now].append(paper.paper_id)
+        papers_by_title[paper.paper_title].append(paper.paper_id)
+
+    acm_by_title = {}
+    if acm_csv:
+        acm_df, _ = align_titles(regstatus['papermerged_df'], create_acm_df(acm_csv))
+        acm_by_title = {row_now.P_title: {'doi': None if pd.isna(row_now.DOI) else row_now.DOI, \
+                                          'acm_type': None if pd.isna(row_now.ACM_type) \
+                                          else row_now.ACM_type} \
+                        for row_now in acm_df.itertuples(index=False)}
+
+    return {'loaded': datetime.datetime.now().isoformat(timespec='seconds'),
+            'xml_dict': xml_dict,
+            'paper_store': paper_store,
+            'regstatus': regstatus,
+            'registrations': registrations,
+            'unmatched': unmatched,
+            'papers_by_id': papers_by_id,
+            'papers_by_number': papers_by_number,
+            'papers_by_title': papers_by_title,
+            'acm_by_title': acm_by_title,
+            'n_registrations': len(reg_df),
+            'n_unregistered': sum(1 for paper in paper_store['papers'] \
+                                  if (paper.tag, paper_number(paper.event_tracking_number)) \
+                                  not in registrations)}
+
+# The paper_json function returns a paper of the store with its authors,
+# registrations and, when the ACM .csv file was read, its DOI.
+def paper_json(data_in, paper_id):
+    paper = data_in['paper_store']['papers'][paper_id]
+    id_now = paper_number(paper.event_tracking_number)
+    paper_registrations = data_in['registrations'].get((paper.tag, id_now), [])
+    paper_out = {'tag': paper.tag,
+                 'id': id_now,
+                 'event_tracking_number': paper.event_tracking_number,
+                 'type': paper.paper_type,
+                 'title': paper.paper_title,
+                 'authors': paper_authors(data_in['paper_store'], paper_id),
+                 'registered': bool(paper_registrations),
+                 'registrations': paper_registrations}
+    if paper.paper_title in data_in['acm_by_title']:
+        paper_out.update(data_in['acm_by_title'][paper.paper_title])
+
+    return paper_out
+
+def _yes_no(value_in):
+    if value_in is None:
+        return None
+    if value_in.lower() in ('yes', 'true', '1'):
+        return True
+    if value_in.lower() in ('no', 'false', '0'):
+        return False
+    raise ValueError('expected yes or no, not "{}"'.format(value_in))
+
+# The check_params function raises a ValueError, answered with a 400 status,
+# when the query has a parameter the path does not take, an empty value or a
+# track tag that was not read.
+def check_params(data_in, params_in, allowed_in):
+    unknown = sorted(set(params_in) - set(allowed_in))
+    if unknown:
+        raise ValueError('unknown parameter(s) {}, expected {}'.format( \
+            ', '.join(unknown), ', '.join(allowed_in) or 'none'))
+    for key_now, value_now in params_in.items():
+        if not value_now.strip():
+            raise ValueError('empty value for parameter ' + key_now)
+    if params_in.get('tag') is not None and params_in['tag'] not in data_in['xml_dict']:
+        raise ValueError('unknown tag "{}", expected {}'.format( \
+            params_in['tag'], ', '.join(data_in['xml_dict'])))
+
+# The query_papers function returns the papers matching the query parameters
+# of /papers (and /unregistered): tag, id, title, type and registered.
+def query_papers(data_in, params_in):
+    paper_store = data_in['paper_store']
+    if params_in.get('id') is not None and params_in.get('tag') is not None:
+        paper_id = data_in['papers_by_id'].get((params_in['tag'], params_in['id']))
+        paper_ids = [] if paper_id is None else [paper_id]
+    elif params_in.get('id') is not None:
+        # Without a tag, the papers with this ID in every track
+        paper_ids = data_in['papers_by_number'].get(params_in['id'], [])
+    elif params_in.get('title') is not None:
+        ref_title, _ = match_title(data_in['regstatus']['title_index'], params_in['title'])
+        paper_ids = data_in['papers_by_title'].get(ref_title, [])
+    else:
+        paper_ids = range(len(paper_store['papers']))
+
+    registered = _yes_no(params_in.get('registered'))
+    papers_out = []
+    for paper_id in paper_ids:
+        paper = paper_store['papers'][paper_id]
+        if params_in.get('tag') is not None and paper.tag != params_in['tag']:
+            continue
+        if params_in.get('type') is not None and paper.paper_type != params_in['type']:
+            continue
+        paper_out = paper_json(data_in, paper_id)
+        if registered is not None and paper_out['registered'] != registered:
+            continue
+        papers_out.append(paper_out)
+
+    return {'count': len(papers_out), 'papers': papers_out}
+
+def query_unregistered(data_in, params_in):
+    return query_papers(data_in, dict(params_in, registered='no'))
+
+def query_authors(data_in, params_in):
+    if params_in.get('email') is None and params_in.get('name') is None:
+        raise ValueError('give email and/or name')
+    email, name = params_in.get('email'), params_in.get('name')
+    paper_store = data_in['paper_store']
+    papers = papers_for_author(paper_store, email=email, name=name)
+    paper_ids = dict.fromkeys(paper.paper_id for paper in papers)
+
+    return {'authors': [a_author._asdict() for a_author in \
+                        find_authors(paper_store, email=email, name=name)],
+            'papers': [paper_json(data_in, paper_id) for paper_id in paper_ids]}
+
+def _table_json(df_in):
+    return {str(row_now): {str(col_now): int(df_in.loc[row_now, col_now]) \
+                           for col_now in df_in.columns} \
+            for row_now in df_in.index}
+
+def query_summary(data_in, params_in):
+    regstatus = data_in['regstatus']
+    return {'registration_by_track': _table_json(regstatus['paperreg_summarydf']),
+            'types_by_track': _table_json(regstatus['piv_tagtypedf']),
+            'unmatched_registrations': len(data_in['unmatched'])}
+
+def query_status(data_in, params_in):
+    return {'loaded': data_in['loaded'],
+            'tracks': list(data_in['xml_dict']),
+            'papers': len(data_in['paper_store']['papers']),
+            'registrations': data_in['n_registrations'],
+            'unregistered_papers': data_in['n_unregistered']}
+
+# The query functions of each path. Each one takes the loaded data and the
+# query parameters, and returns what is sent back as JSON.
+QUERIES = {'/status': query_status,
+           '/papers': query_papers,
+           '/unregistered': query_unregistered,
+           '/authors': query_authors,
+           '/summary': query_summary}
+
+# The query parameters each path takes
+QUERY_PARAMS = {'/status': (),
+                '/papers': ('tag', 'id', 'title', 'type', 'registered'),
+                '/unregistered': ('tag', 'type'),
+                '/authors': ('email', 'name'),
+                '/summary': ()}
+
+# The QueryHandler class answers the GET requests of the server from the data
+# currently held by server.data_holder.
+class QueryHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlsplit(self.path)
+        path = url.path.rstrip('/') or '/status'
+        if path not in QUERIES:
+            self._send(404, {'error': 'unknown path ' + url.path, 'paths': list(QUERIES)})
+            return
+        params = {key_now: values_now[-1] for key_now, values_now \
+                  in parse_qs(url.query, keep_blank_values=True).items()}
+        data = self.server.data_holder['data']
+        try:
+            check_params(data, params, QUERY_PARAMS[path])
+            self._send(200, QUERIES[path](data, params))
+        except ValueError as err:
+            self._send(400, {'error': str(err)})
+
+    def _send(self, status_in, body_in):
+        body = json.dumps(body_in, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status_in)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format_in, *args_in):
+        pass
+
+# The reload_data function reads the inputs again and swaps the new data in,
+# so queries are answered from the previous data while the inputs are read.
+def reload_data(args, holder_in):
+    started = time.perf_counter()
+    holder_in['data'] = load_data(args.xml_list, args.form_csv, args.acm_csv)
+    print('Loaded', len(holder_in['data']['paper_store']['papers']), 'papers and', \
+          holder_in['data']['n_registrations'], 'registrations in', \
+          round(time.perf_counter() - started, 2), 's')
+
+# The main function runs the script (see acm_assist.py).
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(description='Answer queries about the ' \
+                                     'papers and registrations from a local ' \
+                                     'HTTP server.', prog=prog)
+    parser.add_argument('xml_list', help='.txt file listing the .xml files ' \
+                        'produced by HotCRP')
+    parser.add_argument('form_csv', help='.csv file produced by Google forms')
+    parser.add_argument('--acm-csv', help='.csv file produced by ACM, to add ' \
+                        'the DOI of each paper')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, \
+                        help='port to listen on, on 127.0.0.1 (default: ' \
+                        '{})'.format(DEFAULT_PORT))
+    parser.add_argument('--no-watch', action='store_true', \
+                        help='do not read the inputs again when they change')
+    args = parser.parse_args(argv)
+
+    data_holder = {}
+    reload_data(args, data_holder)
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), QueryHandler)
+    server.data_holder = data_holder
+
+    if not args.no_watch:
+        def _input_files():
+            return [args.xml_list, args.form_csv] + \
+                   ([args.acm_csv] if args.acm_csv else []) + \
+                   list(data_holder['data']['xml_dict'].values())
+        threading.Thread(target=watch_files, daemon=True, \
+                         args=(_input_files, lambda changed: reload_data(args, data_holder))) \
+                 .start()
+
+    print('Answering queries on http://127.0.0.1:{}/ (press Ctrl+C to ' \
+          'stop)'.format(args.port))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print('Stopped the server')
+    finally:
+        server.server_close()
+
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
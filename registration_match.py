@@ -0,0 +1,123 @@
+import numpy as np
+import pandas as pd
+from paper_store import normalize_email
+from title_join import MATCH_THRESHOLD, align_titles
+
+"""
+Description:
+This module matches the rows of the Google form (one per registration) to the
+papers read from the HotCRP .xml files. A registration is matched to a paper
+in two ways:
+- by email: the "Username" email used to fill in the form is one of the
+author emails of the paper. Emails are compared after removing case, a
+"+tag" suffix and the dots of Gmail addresses (see
+paper_store.normalize_email),
+- by title: the title typed in on the form matches the title of the paper
+(see title_join.py).
+
+The author emails of every paper are exploded into one (paper, email) row per
+author and joined with the form emails on a hash of the normalized email, and
+the aligned titles are joined on the title, so the matching takes linear time
+in the number of papers, authors and registrations.
+
+When a registration has several candidate papers, e.g. because its author has
+more than one paper, the candidates are ranked as follows:
+1. papers matched both by email and by title,
+2. papers whose title matches exactly (once normalized), so someone
+registering a paper they are not an author of is not moved to one of their
+own papers,
+3. papers matched by email only,
+4. papers whose title is a near match,
+and, within each rank, the paper whose "Id" is the "P_id" given on the form
+comes first, then the papers in the order they were read. A registration
+matched by email goes to that first paper only. A registration matched by
+title only goes to every paper of the best rank, as several papers can share
+a title (e.g. the same work in two tracks) and nothing on the form tells them
+apart, so it is counted for each of them, as a join on the title would.
+
+Example usage:
+    regdata_df, reg_rows, reg_paper, reg_method = match_registrations(paper_df, reg_df)
+"""
+
+# The _email_keys function normalizes a column of emails, calling
+# normalize_email once per distinct email.
+def _email_keys(emails_in):
+    emails_in = emails_in.astype(object)
+
+    return emails_in.map(dict(zip(emails_in.drop_duplicates(), \
+                                  map(normalize_email, emails_in.drop_duplicates()))))
+
+# The explode_emails function returns one row per author email of each paper:
+# "paper_row" is the position of the paper in paperdata_in and "email_key" the
+# normalized email.
+def explode_emails(paperdata_in):
+    emails = paperdata_in['Email'].reset_index(drop=True).str.split(';').explode()
+    paper_emails = pd.DataFrame({'paper_row': emails.index.to_numpy(), \
+                                 'email_key': _email_keys(emails).to_numpy()})
+
+    return paper_emails[paper_emails['email_key'] != ''].drop_duplicates()
+
+# The match_registrations function returns:
+# - regdata_in with the titles aligned to the paper titles and the
+# "Match_score" column added (see title_join.align_titles),
+# and one entry per (registration, paper) pair, ordered by registration, in
+# three arrays:
+# - the position of the registration in regdata_in, repeated when it is
+# matched to several papers by title,
+# - the position in paperdata_in of the paper it is matched to, or -1,
+# - how it was matched: "email+title", "email", "title" or "N/A".
+def match_registrations(paperdata_in, regdata_in, title_index=None, \
+                        threshold=MATCH_THRESHOLD):
+    regdata_in, _ = align_titles(paperdata_in, regdata_in, threshold=threshold, \
+                                 index_in=title_index)
+    n_reg = len(regdata_in)
+    paper_titles = pd.DataFrame({'paper_row': np.arange(len(paperdata_in)), \
+                                 'P_title': paperdata_in['P_title'].to_numpy()})
+
+    # Registrations whose title matched a paper title
+    reg_titles = pd.DataFrame({'reg_row': np.arange(n_reg), \
+                               'P_title': regdata_in['P_title'].to_numpy(), \
+                               'exact': (regdata_in['Match_score'] == 1.0).to_numpy()})
+    reg_titles = reg_titles[regdata_in['Match_score'].notna().to_numpy()]
+    title_pairs = reg_titles.merge(paper_titles, on='P_title')[['reg_row', 'paper_row', 'exact']]
+
+    # Registrations whose email is one of the author emails of a paper
+    reg_emails = pd.DataFrame({'reg_row': np.arange(n_reg), \
+                               'email_key': _email_keys(regdata_in['Username']).to_numpy()})
+    email_pairs = reg_emails[reg_emails['email_key'] != ''].merge( \
+        explode_emails(paperdata_in), on='email_key')[['reg_row', 'paper_row']]
+    email_pairs = email_pairs.drop_duplicates()
+
+    pairs = title_pairs.merge(email_pairs, on=['reg_row', 'paper_row'], \
+                              how='outer', indicator=True)
+    by_title = (pairs['_merge'] != 'right_only').to_numpy()
+    by_email = (pairs['_merge'] != 'left_only').to_numpy()
+    exact = pairs['exact'].fillna(False).to_numpy(dtype=bool)
+    pairs['rank'] = np.select([by_email & by_title, exact, by_email], [0, 1, 2], 3)
+    pairs['method'] = np.select([by_email & by_title, by_email], \
+                                ['email+title', 'email'], 'title')
+    if 'Id' in paperdata_in.columns and 'P_id' in regdata_in.columns:
+        paper_ids = pd.to_numeric(paperdata_in['Id'], errors='coerce').to_numpy()
+        reg_ids = pd.to_numeric(regdata_in['P_id'], errors='coerce').to_numpy()
+        pairs['other_id'] = paper_ids[pairs['paper_row']] != reg_ids[pairs['reg_row']]
+    else:
+        pairs['other_id'] = True
+
+    # The first pair of each registration is its best match, and the other
+    # pairs of the same rank are kept when it is a match by title only
+    pairs = pairs.sort_values(['reg_row', 'rank', 'other_id', 'paper_row'])
+    cond_first = ~pairs['reg_row'].duplicated().to_numpy()
+    best_rank = pairs.groupby('reg_row')['rank'].transform('min').to_numpy()
+    cond_keep = cond_first | ((pairs['rank'].to_numpy() == best_rank) & \
+                              (pairs['method'] == 'title').to_numpy())
+    best = pairs[cond_keep].sort_values(['reg_row', 'paper_row'])
+
+    unmatched = np.setdiff1d(np.arange(n_reg), best['reg_row'].to_numpy())
+    reg_rows = np.concatenate([best['reg_row'].to_numpy(dtype=np.int64), unmatched])
+    reg_paper = np.concatenate([best['paper_row'].to_numpy(dtype=np.int64), \
+                                np.full(len(unmatched), -1)])
+    reg_method = np.concatenate([best['method'].to_numpy(dtype=object), \
+                                 np.full(len(unmatched), 'N/A', dtype=object)])
+    row_order = np.argsort(reg_rows, kind='stable')
+
+    return regdata_in, reg_rows[row_order], reg_paper[row_order], reg_method[row_order]
@@ -0,0 +1,120 @@
+import contextlib
+import datetime
+import json
+import time
+import tracemalloc
+
+"""
+Description:
+This module implements the --profile option of the three scripts in this
+repository. Each named stage of a run (e.g. "xml_parse", "acm_csv_load",
+"merge", "groupby", "pivot", "xlsx_write") records:
+- wall_seconds: the elapsed wall-clock time,
+- cpu_seconds: the CPU time used by this process (worker processes started
+with --jobs are not included),
+- peak_mb: with --profile-memory only, the peak memory allocated by Python
+during the stage, as measured by tracemalloc.
+The memory held by the main dataframes of the run (e.g. the merged paper and
+registration dataframes) is also recorded, with the number of rows and the
+memory of each, including the text they hold (see frame_schema.py for the
+dtypes that keep it low).
+
+At the end of the run, the stages are written to a .json report and a short
+summary table is printed. tracemalloc records every allocation, which can make
+pandas-heavy stages several times slower, so memory is only traced when asked
+for: the times of a run with --profile alone are representative, while those
+of a run with --profile-memory are not, and are only useful to compare with
+other runs with --profile-memory.
+
+Example usage:
+    profile = new_profile('publication_checklist.py', memory=True)
+    with profile_stage(profile, 'xml_parse'):
+        hotcrp_df = create_hotcrp_df(...)
+    write_report(profile, 'exported-data/profile.json')
+    record_frames(profile, {'hotcrp_df': hotcrp_df})
+    print_summary(profile)
+
+All the functions accept None instead of a profile, in which case nothing is
+measured, so callers do not need to check whether --profile was given.
+"""
+
+# The new_profile function returns an empty profile of the script script_in.
+# The peak memory of each stage is only traced when memory is True.
+def new_profile(script_in, memory=False):
+    return {'script': script_in,
+            'started': datetime.datetime.now().isoformat(timespec='seconds'),
+            'memory_traced': memory,
+            'stages': [],
+            'frames': []}
+
+# The profile_stage function measures the code run inside the with block and
+# adds it to the profile as a stage called stage_in. peak_mb is None when the
+# memory is not traced.
+@contextlib.contextmanager
+def profile_stage(profile_in, stage_in):
+    if profile_in is None:
+        yield
+        return
+
+    trace_memory = profile_in.get('memory_traced', False)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if trace_memory:
+        tracemalloc.reset_peak()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        yield
+    finally:
+        cpu_seconds = time.process_time() - cpu_start
+        wall_seconds = time.perf_counter() - wall_start
+        peak_mb = round(tracemalloc.get_traced_memory()[1] / 2**20, 3) if trace_memory \
+                  else None
+        if started_tracing:
+            tracemalloc.stop()
+        profile_in['stages'].append({'stage': stage_in,
+                                     'wall_seconds': round(wall_seconds, 6),
+                                     'cpu_seconds': round(cpu_seconds, 6),
+                                     'peak_mb': peak_mb})
+
+# The record_frames function adds the number of rows and the memory used by
+# each dataframe of frames_in, a dictionary of {name: dataframe}, to the
+# profile.
+def record_frames(profile_in, frames_in):
+    if profile_in is None:
+        return
+    for name_now, df_now in frames_in.items():
+        profile_in['frames'].append({'frame': name_now,
+                                     'rows': len(df_now),
+                                     'memory_mb': round(int(df_now.memory_usage( \
+                                         index=True, deep=True).sum()) / 2**20, 3)})
+
+def write_report(profile_in, report_out):
+    if profile_in is None:
+        return
+    profile_in['total_wall_seconds'] = round(sum(stage_now['wall_seconds'] \
+                                                 for stage_now in profile_in['stages']), 6)
+    with open(report_out, 'w') as f_out:
+        json.dump(profile_in, f_out, indent=2)
+
+# The print_summary function prints one line per stage, with the share of the
+# total wall-clock time spent in that stage.
+def print_summary(profile_in):
+    if profile_in is None:
+        return
+    total_wall = sum(stage_now['wall_seconds'] for stage_now in profile_in['stages'])
+    print('{:<24}{:>10}{:>10}{:>10}{:>8}'.format('stage', 'wall s', 'cpu s', \
+                                                 'peak MB', 'share'))
+    for stage_now in profile_in['stages']:
+        share = stage_now['wall_seconds'] / total_wall if total_wall else 0.0
+        peak_mb = '-' if stage_now['peak_mb'] is None else '{:.1f}'.format(stage_now['peak_mb'])
+        print('{:<24}{:>10.3f}{:>10.3f}{:>10}{:>7.0%}'.format( \
+            stage_now['stage'], stage_now['wall_seconds'], \
+            stage_now['cpu_seconds'], peak_mb, share))
+    print('{:<24}{:>10.3f}'.format('total', total_wall))
+    if profile_in.get('frames'):
+        print('{:<24}{:>10}{:>10}'.format('frame', 'rows', 'MB'))
+        for frame_now in profile_in['frames']:
+            print('{:<24}{:>10}{:>10.2f}'.format(frame_now['frame'], frame_now['rows'], \
+                                                 frame_now['memory_mb']))
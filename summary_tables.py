@@ -0,0 +1,121 @@
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+"""
+Description:
+This module computes the count tables of the registration status .xlsx file
+(see publication_registration_status.py), e.g. the number of papers of each
+type at each track, from one merged dataframe.
+
+Each key column used by any of the tables is converted once to a categorical
+(an integer code per row and the sorted list of distinct values), and each
+table is then counted with a single np.bincount over the codes of its two
+keys, instead of calling len once per group as pd.pivot_table(aggfunc=len)
+does. The tables are described by SummaryTable records, so a new summary is
+added by adding a record, without another pass over the data. A key column
+can hold several ';'-separated values per row (e.g. the countries of the
+authors of a paper), in which case each row is counted once for each of its
+values.
+
+Example usage:
+    tables = count_tables(papers_df, {'by_type': SummaryTable('Tag', 'Type'),
+                                      'by_country': SummaryTable('Country', 'Tag')},
+                          multi_valued=['Country'])
+"""
+
+# A summary table counts the rows of a dataframe by the values of the column
+# "index" (its rows) and the column "columns" (its columns, or a single
+# "Count" column when None). rows names the boolean mask selecting the rows
+# that are counted (all of them when None), either one of the masks given to
+# count_tables or a boolean column of the dataframe.
+SummaryTable = namedtuple('SummaryTable', ['index', 'columns', 'rows'], \
+                          defaults=[None, None])
+
+# The _categorical_key function returns the code of each value of the column
+# and the sorted distinct values. With sep, the codes are those of the distinct
+# strings of the column (e.g. once per combination of countries), and the
+# values they hold are also returned as (the distinct string of each value,
+# the code of each value, the number of distinct strings), or None otherwise.
+# The distinct strings are split in a single str.split call and their values
+# are numbered with a single pd.factorize.
+def _categorical_key(column_in, sep=None):
+    if sep is None:
+        key = pd.Categorical(column_in)
+        return key.codes.astype(np.int64), key.categories, None
+
+    row_codes, distinct = pd.factorize(column_in)
+    distinct = [str(value_now) for value_now in distinct]
+    parts = pd.Index(sep.join(distinct).split(sep)).str.strip()
+    part_owners = np.repeat(np.arange(len(distinct)), \
+                            [value_now.count(sep) + 1 for value_now in distinct])
+    cond_part = (parts != '')
+    part_codes, values = pd.factorize(parts[cond_part], sort=True)
+
+    return row_codes.astype(np.int64), values, \
+        (part_owners[cond_part], part_codes.astype(np.int64), len(distinct))
+
+# The _count_pairs function counts the rows of each (row code, column code)
+# pair, as a 2-D array of n_rows x n_cols.
+def _count_pairs(row_codes, col_codes, n_rows, n_cols):
+    counts = np.bincount(row_codes * n_cols + col_codes, minlength=n_rows * n_cols)
+
+    return counts.reshape(n_rows, n_cols)
+
+# The _spread_parts function turns the counts of the distinct strings of a
+# multi-valued key (the rows of counts_in) into the counts of their values.
+def _spread_parts(counts_in, parts_in, n_values):
+    part_owners, part_codes, _ = parts_in
+    counts_out = np.zeros((n_values, counts_in.shape[1]), dtype=counts_in.dtype)
+    np.add.at(counts_out, part_codes, counts_in[part_owners])
+
+    return counts_out
+
+# The count_tables function returns a dictionary of {name: dataframe} with one
+# count table per SummaryTable of tables_in. Values that are missing in either
+# key are not counted, and rows or columns without any count are dropped, as
+# in pd.pivot_table. multi_valued lists the key columns holding several
+# sep-separated values per row. The rows are first counted by the codes of
+# both keys, so a multi-valued key is only spread over its values once per
+# distinct string, not once per row.
+def count_tables(df_in, tables_in, masks=None, multi_valued=(), sep=';'):
+    masks = masks or {}
+    keys = {}
+    for table_now in tables_in.values():
+        for key_now in (table_now.index, table_now.columns):
+            if key_now is not None and key_now not in keys:
+                keys[key_now] = _categorical_key(df_in[key_now], \
+                                                 sep if key_now in multi_valued else None)
+
+    tables = {}
+    for name_now, table_now in tables_in.items():
+        row_codes, row_values, row_parts = keys[table_now.index]
+        if table_now.columns is None:
+            col_codes, col_values, col_parts = np.zeros(len(df_in), dtype=np.int64), \
+                pd.Index(['Count']), None
+        else:
+            col_codes, col_values, col_parts = keys[table_now.columns]
+        if row_parts is not None and col_parts is not None:
+            raise ValueError('Summary table {}: only one of its keys can hold ' \
+                             'several values per row'.format(name_now))
+
+        cond_count = (row_codes >= 0) & (col_codes >= 0)
+        if table_now.rows is not None:
+            cond_count &= np.asarray(masks[table_now.rows] if table_now.rows in masks \
+                                     else df_in[table_now.rows], dtype=bool)
+
+        # The rows of a multi-valued key are counted by distinct string first
+        counts = _count_pairs(row_codes[cond_count], col_codes[cond_count], \
+                              len(row_values) if row_parts is None else row_parts[2], \
+                              len(col_values) if col_parts is None else col_parts[2])
+        if row_parts is not None:
+            counts = _spread_parts(counts, row_parts, len(row_values))
+        if col_parts is not None:
+            counts = _spread_parts(counts.T, col_parts, len(col_values)).T
+
+        table = pd.DataFrame(counts, \
+                             index=pd.Index(row_values, name=table_now.index), \
+                             columns=pd.Index(col_values, name=table_now.columns))
+        tables[name_now] = table.loc[counts.any(axis=1), counts.any(axis=0)]
+
+    return tables
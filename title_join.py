@@ -0,0 +1,163 @@
+import re
+import unicodedata
+from collections import defaultdict
+
+"""
+Description:
+This module joins paper titles coming from different sources (the .xml file
+produced by HotCRP, the .csv file produced by ACM and the .csv file produced
+by Google Forms), which do not always spell the same title in exactly the same
+way.
+
+Titles are first normalized:
+- accents are removed and the title is case-folded,
+- a leading "Poster:", "Demo:", "Work-in-Progress:" (etc.) prefix is dropped,
+- punctuation is replaced by spaces and repeated whitespace is collapsed.
+
+Titles that are equal once normalized are matched with a score of 1.0. The
+remaining titles are looked up in an inverted index of words: only the
+reference titles that share a word with the title being looked up are
+considered (very common words such as "a", "for" or "energy" are skipped, as
+they do not tell titles apart), and the best candidates are scored with the
+Dice coefficient of the character trigrams of the two titles. A candidate is accepted when its score reaches MATCH_THRESHOLD.
+Because of the index, each lookup only touches a handful of candidates, so
+matching n titles against m titles takes roughly O(n + m) time rather than
+O(n*m).
+
+Example usage:
+    aligned_df, unmatched = align_titles(hotcrp_df, acm_df)
+"""
+
+NGRAM_SIZE = 3
+MATCH_THRESHOLD = 0.85
+# Words that appear in more than this fraction of the reference titles (and in
+# more than MIN_BLOCK_SIZE titles) are not used to find candidates.
+MAX_BLOCK_FRACTION = 0.05
+MIN_BLOCK_SIZE = 50
+# Number of candidates (those sharing the most words) that are scored.
+MAX_CANDIDATES = 10
+
+TITLE_PREFIX_RE = re.compile(r'^\s*(poster|demo|demo abstract|short paper|'
+                             r'work[\s-]*in[\s-]*progress|wip|'
+                             r'extended abstract)\s*:\s*')
+NON_ALNUM_RE = re.compile(r'[\W_]+')
+
+# The normalize_title function returns the normalized form of a title, which
+# is used as the exact-match key and to compute the trigrams of the title.
+def normalize_title(title_in):
+    if not isinstance(title_in, str):
+        return ''
+    title_now = unicodedata.normalize('NFKD', title_in)
+    title_now = ''.join(c_now for c_now in title_now \
+                        if not unicodedata.combining(c_now))
+    title_now = title_now.casefold()
+    title_now = TITLE_PREFIX_RE.sub('', title_now)
+    title_now = NON_ALNUM_RE.sub(' ', title_now)
+
+    return ' '.join(title_now.split())
+
+def _title_ngrams(norm_title):
+    padded = ' ' + norm_title + ' '
+
+    return frozenset(padded[i:i + NGRAM_SIZE] \
+                     for i in range(len(padded) - NGRAM_SIZE + 1))
+
+# The build_title_index function indexes a list of reference titles. The
+# returned dictionary holds the exact-match lookup on normalized titles, the
+# trigram sets of each title and the word -> title postings lists.
+def build_title_index(titles_in):
+    titles = list(titles_in)
+    exact = {}
+    ngrams = []
+    postings = defaultdict(list)
+    for idx_now, title_now in enumerate(titles):
+        norm_title = normalize_title(title_now)
+        exact.setdefault(norm_title, idx_now)
+        ngrams.append(_title_ngrams(norm_title))
+        for word in set(norm_title.split()):
+            postings[word].append(idx_now)
+
+    return {'titles': titles,
+            'exact': exact,
+            'ngrams': ngrams,
+            'postings': postings,
+            'max_postings': max(MIN_BLOCK_SIZE, \
+                                int(len(titles) * MAX_BLOCK_FRACTION))}
+
+# The match_title function returns (reference title, score) for the best match
+# of title_in in the index, or (None, score of the best candidate) when no
+# candidate reaches the threshold.
+def match_title(index_in, title_in, threshold=MATCH_THRESHOLD):
+    norm_title = normalize_title(title_in)
+    if not norm_title:
+        return None, 0.0
+    if norm_title in index_in['exact']:
+        return index_in['titles'][index_in['exact'][norm_title]], 1.0
+
+    shared = defaultdict(int)
+    for word in set(norm_title.split()):
+        posting = index_in['postings'].get(word)
+        if posting is None or len(posting) > index_in['max_postings']:
+            continue
+        for idx_now in posting:
+            shared[idx_now] += 1
+
+    grams = _title_ngrams(norm_title)
+    best_idx, best_score = None, 0.0
+    candidates = sorted(shared, key=shared.get, reverse=True)[:MAX_CANDIDATES]
+    for idx_now in candidates:
+        cand_grams = index_in['ngrams'][idx_now]
+        score = 2.0 * len(grams & cand_grams) / (len(grams) + len(cand_grams))
+        if score > best_score:
+            best_idx, best_score = idx_now, score
+
+    if best_idx is None or best_score < threshold:
+        return None, best_score
+
+    return index_in['titles'][best_idx], best_score
+
+# The align_titles function rewrites the title column of other_in so that each
+# title that matches a title of reference_in is spelled exactly like it, which
+# lets the two dataframes be joined with an ordinary pd.merge on that column.
+# A "Match_score" column is added with the confidence of each match (NaN for
+# rows that were not matched). The titles of other_in that could not be
+# matched are returned as a list. An index already built with
+# build_title_index from the titles of reference_in can be passed as index_in.
+def align_titles(reference_in, other_in, column='P_title', \
+                 threshold=MATCH_THRESHOLD, index_in=None):
+    index_now = index_in
+    if index_now is None:
+        index_now = build_title_index(reference_in[column].drop_duplicates())
+
+    title_map = {}
+    score_map = {}
+    unmatched = []
+    for title_now in other_in[column].drop_duplicates():
+        ref_title, score = match_title(index_now, title_now, threshold)
+        if ref_title is None:
+            unmatched.append(title_now)
+        else:
+            title_map[title_now] = ref_title
+            score_map[title_now] = score
+
+    aligned_df = other_in.copy()
+    aligned_df['Match_score'] = aligned_df[column].map(score_map)
+    ref_titles = aligned_df[column].map(title_map)
+    aligned_df[column] = ref_titles.where(ref_titles.notna(), aligned_df[column])
+
+    return aligned_df, unmatched
+
+# The report_unmatched function prints the titles that could not be matched,
+# so that they can be checked by hand.
+def report_unmatched(label_in, titles_in):
+    print(label_in, 'has', len(titles_in), 'unmatched titles')
+    for title_now in titles_in:
+        print('  -', title_now)
+
+# The unmatched_reference function returns the titles of reference_in that no
+# row of aligned_in has been matched to.
+def unmatched_reference(reference_in, aligned_in, column='P_title'):
+    matched = set(aligned_in[column])
+
+    return [title_now for title_now in reference_in[column].drop_duplicates() \
+            if title_now not in matched]
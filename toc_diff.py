@@ -0,0 +1,86 @@
+import argparse
+import hashlib
+import json
+from hotcrp_reader import iter_papers
+
+"""
+Description:
+This script compares two snapshots of the XML file available on the HotCRP
+website (via 'Settings' -> 'ACM' -> 'Download TOC' button), e.g. the TOC
+downloaded last week and the one downloaded today, and lists the papers that
+were added, removed or changed in between.
+
+Each paper is identified by its "event_tracking_number" and summarised by a
+fingerprint: a hash of its type, its title and its author block (the name,
+affiliation, country and email of each author, in order). Two snapshots are
+compared by comparing the fingerprints of each paper, which takes linear time
+in the number of papers. The fingerprints are also used by
+publication_checklist.py --update-from to keep the checks already filled in
+for the papers that did not change.
+
+Only the standard library is used.
+
+Syntax: python toc_diff.py <path-to-old-xmlfile> <path-to-new-xmlfile> [--json]
+Example syntax: python toc_diff.py data/sample-main-acmcms-toc.xml
+                data/sample-main-acmcms-toc.xml
+"""
+
+# The paper_fingerprint function returns the fingerprint of a paper. authors_in
+# holds one (name, affiliation, country, email) tuple per author, e.g. the
+# Author records of hotcrp_reader.py.
+def paper_fingerprint(paper_type, paper_title, authors_in):
+    paper_fields = [paper_type, paper_title, [list(a_author) for a_author in authors_in]]
+    fields_json = json.dumps(paper_fields, ensure_ascii=False, separators=(',', ':'))
+
+    return hashlib.blake2b(fields_json.encode('utf-8'), digest_size=16).hexdigest()
+
+# The toc_fingerprints function reads the .xml file one paper at a time and
+# returns a dictionary of {event_tracking_number: fingerprint}.
+def toc_fingerprints(xml_in):
+    fingerprints = {}
+    for paper in iter_papers(xml_in):
+        fingerprints[paper.event_tracking_number] = paper_fingerprint( \
+            paper.paper_type, paper.paper_title, paper.authors)
+
+    return fingerprints
+
+# The diff_fingerprints function compares two dictionaries of fingerprints and
+# returns the keys that were added, removed and changed, in the order of the
+# snapshot they are found in.
+def diff_fingerprints(old_in, new_in):
+    return {'added': [key_now for key_now in new_in if key_now not in old_in],
+            'removed': [key_now for key_now in old_in if key_now not in new_in],
+            'changed': [key_now for key_now in new_in \
+                        if key_now in old_in and old_in[key_now] != new_in[key_now]]}
+
+def diff_tocs(old_xml, new_xml):
+    return diff_fingerprints(toc_fingerprints(old_xml), toc_fingerprints(new_xml))
+
+def report_diff(diff_in):
+    for change_now in ('added', 'removed', 'changed'):
+        print(len(diff_in[change_now]), 'papers', change_now)
+        for key_now in diff_in[change_now]:
+            print('  -', key_now)
+
+# The main function runs the script (see acm_assist.py) and returns 1 when the
+# snapshots differ, as diff does.
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(description='List the papers added, ' \
+                                     'removed or changed between two HotCRP ' \
+                                     'TOC .xml files.', prog=prog)
+    parser.add_argument('old_xml', help='earlier .xml file produced by HotCRP')
+    parser.add_argument('new_xml', help='later .xml file produced by HotCRP')
+    parser.add_argument('--json', action='store_true', \
+                        help='print the differences as JSON')
+    args = parser.parse_args(argv)
+
+    toc_diff = diff_tocs(args.old_xml, args.new_xml)
+    if args.json:
+        print(json.dumps(toc_diff, indent=2))
+    else:
+        report_diff(toc_diff)
+
+    return 1 if any(toc_diff.values()) else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,80 @@
+import os
+import time
+
+"""
+Description:
+This module implements the --watch option of publication_checklist.py and
+publication_registration_status.py: it keeps polling the input files and
+calls back into the script once they have changed, so that the .xlsx file can
+be regenerated without restarting Python, re-importing pandas or re-parsing
+the inputs that did not change.
+
+Changes are debounced: once a change has been seen, the files have to stay
+unchanged for WATCH_DEBOUNCE seconds before the callback is run, so that a
+file being copied or saved in several steps triggers a single refresh. The
+callback receives the set of paths that changed.
+
+Only the standard library is used (the files are polled with os.stat), so the
+watch mode works the same on every platform.
+"""
+
+WATCH_INTERVAL = 1.0
+WATCH_DEBOUNCE = 2.0
+
+# The file_stamp function returns what is compared between two polls: the
+# modification time and size of a file, or None if it does not exist.
+def file_stamp(file_in):
+    try:
+        f_stat = os.stat(file_in)
+    except OSError:
+        return None
+
+    return (f_stat.st_mtime_ns, f_stat.st_size)
+
+def _changed_paths(stamps_in, paths_in):
+    changed = set()
+    for path_now in paths_in:
+        stamp_now = file_stamp(path_now)
+        if stamps_in.get(path_now) != stamp_now:
+            changed.add(path_now)
+        stamps_in[path_now] = stamp_now
+
+    return changed
+
+# The watch_files function polls the files returned by paths_fn every interval
+# seconds and calls on_change(changed_paths) after each debounced burst of
+# changes. paths_fn is called again after every refresh, so the set of watched
+# files can change (e.g. when a track is added to the .txt file). An error
+# raised by on_change is printed and the files keep being watched. Press
+# Ctrl+C to stop.
+def watch_files(paths_fn, on_change, interval=WATCH_INTERVAL, \
+                debounce=WATCH_DEBOUNCE):
+    stamps = {}
+    _changed_paths(stamps, paths_fn())
+    print('Watching', len(stamps), 'files for changes (press Ctrl+C to stop)')
+    try:
+        while True:
+            time.sleep(interval)
+            changed = _changed_paths(stamps, paths_fn())
+            if not changed:
+                continue
+            # Wait until the files have stopped changing.
+            quiet_since = time.monotonic()
+            while time.monotonic() - quiet_since < debounce:
+                time.sleep(interval)
+                more_changed = _changed_paths(stamps, paths_fn())
+                if more_changed:
+                    changed |= more_changed
+                    quiet_since = time.monotonic()
+
+            print('Changed:', ', '.join(sorted(changed)))
+            try:
+                on_change(changed)
+            except Exception as err:
+                print('Refresh failed:', type(err).__name__, err)
+            # Start watching the files that on_change has started to depend on.
+            for path_now in paths_fn():
+                if path_now not in stamps:
+                    stamps[path_now] = file_stamp(path_now)
+    except KeyboardInterrupt:
+        print('Stopped watching')
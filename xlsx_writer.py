@@ -0,0 +1,124 @@
+import xlsxwriter
+from xlsxwriter.utility import xl_col_to_name
+
+"""
+Description:
+This module holds the .xlsx writing code shared by publication_checklist.py
+and publication_registration_status.py.
+
+The workbooks are written with xlsxwriter's "constant_memory" mode: each row
+is written straight to disk once the next row is started, so memory stays
+bounded however many papers the workbook lists. In this mode rows have to be
+written in order, which is why write_df writes the header, the data and any
+per-row formula of a row before moving on to the next row.
+
+Cell formats are created once per workbook (see create_status_formats), and
+data validation, conditional formats and formulas are applied once to a whole
+column range rather than once per row: a formula column is a single array
+formula, stored once for all its rows.
+
+Example usage:
+    workbook = create_workbook('exported-data/sample-checklist.xlsx')
+    formats = create_status_formats(workbook)
+    worksheet = write_df(workbook, 'Sheet1', df_all)
+    highlight_values(worksheet, 7, len(df_all), [('"FAIL"', formats['bad'])])
+    workbook.close()
+"""
+
+WORKBOOK_OPTIONS = {'constant_memory': True,
+                    'strings_to_urls': False,
+                    'strings_to_numbers': True}
+
+# The create_workbook function opens a new .xlsx file for writing.
+def create_workbook(filetosave):
+    return xlsxwriter.Workbook(filetosave, WORKBOOK_OPTIONS)
+
+# The create_status_formats function adds the formats used to highlight the
+# status columns, and the header format, to the workbook.
+def create_status_formats(workbook):
+    # Add a format. Light red fill with dark red text.
+    format_bad = workbook.add_format({'bg_color': '#FFC7CE',
+                                      'font_color': '#9C0006'})
+    # Add a format. Green fill with dark green text.
+    format_good = workbook.add_format({'bg_color': '#C6EFCE',
+                                       'font_color': '#006100'})
+    # Add a format. Bold header with a border, as written by pandas.
+    format_header = workbook.add_format({'bold': True,
+                                         'border': 1,
+                                         'align': 'center',
+                                         'valign': 'top'})
+
+    return {'bad': format_bad, 'good': format_good, 'header': format_header}
+
+# The write_df function writes df_in to a new worksheet, one row at a time.
+# When index is True, the index of df_in is written as the first column, with
+# a blank header when it has no name (as DataFrame.to_excel does). formulas
+# maps a column name to an array formula filling all the data rows of that
+# column, where "{first_row}" and "{last_row}" are replaced by the Excel row
+# numbers of the first and last data rows. It is written with the first data
+# row, as the rows of a constant_memory worksheet are written in order. links
+# maps a column name to a list of link targets (e.g. "external:file.xlsx"),
+# one per row, so that the cells of that column are written as hyperlinks.
+def write_df(workbook, sheet_name, df_in, index=False, formulas=None,
+             header_format=None, links=None):
+    worksheet = workbook.add_worksheet(sheet_name)
+    header = [str(col_now) for col_now in df_in.columns]
+    if index:
+        header = ['' if name_now is None else str(name_now) \
+                  for name_now in df_in.index.names] + header
+        df_in = df_in.reset_index()
+    # The cells of the formula columns are left to their array formula
+    formula_cols = []
+    for col_name, formula_str in (formulas or {}).items():
+        formula_cols.append((df_in.columns.get_loc(col_name), formula_str))
+    if formula_cols:
+        df_in = df_in.assign(**{col_name: '' for col_name in formulas})
+    # Blank cells are written for missing values, as DataFrame.to_excel does.
+    if df_in.isna().any().any():
+        df_in = df_in.astype(object).where(df_in.notna(), None)
+
+    worksheet.write_row(0, 0, header, header_format)
+
+    link_cols = []
+    for col_name, targets in (links or {}).items():
+        link_cols.append((df_in.columns.get_loc(col_name), targets))
+
+    for row_now, row_values in enumerate(df_in.itertuples(index=False, name=None), 1):
+        worksheet.write_row(row_now, 0, row_values)
+        if row_now == 1:
+            for col_idx, formula_str in formula_cols:
+                worksheet.write_array_formula( \
+                    1, col_idx, len(df_in), col_idx, \
+                    formula_str.format(first_row=2, last_row=len(df_in) + 1))
+        for col_idx, targets in link_cols:
+            worksheet.write_url(row_now, col_idx, targets[row_now - 1], \
+                                string=str(row_values[col_idx]))
+
+    return worksheet
+
+# The validate_list function restricts the cells of a column range to a list
+# of values, using a single data validation rule for the whole range.
+def validate_list(worksheet, first_col, last_col, n_rows, source_in, message_in):
+    if n_rows == 0:
+        return
+    worksheet.data_validation(1, first_col, n_rows, last_col, \
+                              {'validate': 'list', \
+                               'source': source_in, \
+                               'error_message': message_in})
+
+# The highlight_values function adds one conditional format per (value, format)
+# pair to the data rows of a column.
+def highlight_values(worksheet, col_idx, n_rows, rules_in):
+    if n_rows == 0:
+        return
+    for value_now, format_now in rules_in:
+        worksheet.conditional_format(1, col_idx, n_rows, col_idx, \
+                                     {'type': 'cell', \
+                                      'criteria': 'equal to', \
+                                      'value': value_now, \
+                                      'format': format_now})
+
+# The column_name function returns the Excel column letters of a column index,
+# e.g. 0 -> "A", for use in formula templates.
+def column_name(col_idx):
+    return xl_col_to_name(col_idx)